@@ -0,0 +1,55 @@
+import os
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# Shared keep-alive connection pool for translation providers
+HTTP_POOL_SIZE = int(os.getenv("HTTP_POOL_SIZE", "16"))  # connections kept per host
+HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", "5"))  # seconds
+HTTP_READ_TIMEOUT = float(os.getenv("HTTP_READ_TIMEOUT", "20"))  # seconds
+HTTP_RETRIES = int(os.getenv("HTTP_RETRIES", "1"))  # retries on connection errors
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def get_session() -> requests.Session:
+    """
+    Return the process-wide HTTP session, creating it on first use.
+
+    Connections are pooled and kept alive per host, so consecutive provider requests
+    reuse an established TCP/TLS connection instead of opening a new one each time.
+    """
+    global _session
+    with _session_lock:
+        if _session is None:
+            retry = Retry(
+                total=HTTP_RETRIES,
+                connect=HTTP_RETRIES,
+                read=0,
+                status=0,
+                backoff_factor=0.2,
+                allowed_methods=None
+            )
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=HTTP_POOL_SIZE, max_retries=retry, pool_block=True)
+            session = requests.Session()
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            _session = session
+        return _session
+
+
+def get_timeout() -> tuple:
+    """
+    (connect, read) timeout for provider requests.
+    """
+    return (HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT)
+
+
+def close_session():
+    global _session
+    with _session_lock:
+        if _session is not None:
+            _session.close()
+            _session = None
@@ -0,0 +1,253 @@
+import asyncio
+import hashlib
+import os
+import tempfile
+import PyPDF2
+from python_multipart.exceptions import MultipartParseError
+from python_multipart.multipart import MultipartParser, parse_options_header
+
+# Upload limits
+MAX_UPLOAD_MB = float(os.getenv("MAX_UPLOAD_MB", "50"))
+MAX_UPLOAD_PAGES = int(os.getenv("MAX_UPLOAD_PAGES", "1000"))
+
+# Room for the form fields and part headers around the file in a multipart body
+_MULTIPART_OVERHEAD = 64 * 1024
+# Longest plain form field value accepted
+_MAX_FIELD_BYTES = 1024
+# The %PDF- header must start within the first KiB of the file, as PDF readers allow
+_PDF_HEADER_WINDOW = 1024
+
+
+class UploadRejectedError(Exception):
+    """
+    Raised when an upload is refused before any pipeline work starts.
+    """
+
+    def __init__(self, status_code: int, detail: str):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+
+
+class PdfUpload:
+    """
+    A validated PDF upload spooled to disk, with the plain form fields sent alongside it.
+    page_count is None until check_page_count has read it.
+    """
+
+    def __init__(self, path: str, filename: str, sha256: str, size: int, fields: dict, page_count: int = None):
+        self.path = path
+        self.filename = filename
+        self.sha256 = sha256
+        self.size = size
+        self.page_count = page_count
+        self.fields = fields
+
+
+class _UploadParser:
+    """
+    multipart/form-data callbacks that write the 'file' part straight to its spool file,
+    checking its name, size and PDF header as the bytes arrive.
+    """
+
+    def __init__(self, upload_dir: str, max_bytes: int):
+        self.upload_dir = upload_dir
+        self.max_bytes = max_bytes
+
+        self.fields = {}
+        self.filename = None
+        self.path = None
+        self.size = 0
+        self.digest = hashlib.sha256()
+        self.pending = []  # file data parsed from the current chunk, written after it
+
+        self._file = None
+        self._head = b''
+        self._header_checked = False
+        self._headers = {}
+        self._header_field = b''
+        self._header_value = b''
+        self._part_name = None
+        self._part_is_file = False
+        self._field_value = b''
+
+    def callbacks(self) -> dict:
+        return {
+            'on_part_begin': self.on_part_begin,
+            'on_part_data': self.on_part_data,
+            'on_part_end': self.on_part_end,
+            'on_header_field': self.on_header_field,
+            'on_header_value': self.on_header_value,
+            'on_header_end': self.on_header_end,
+            'on_headers_finished': self.on_headers_finished,
+        }
+
+    def on_part_begin(self):
+        self._headers = {}
+        self._part_name = None
+        self._part_is_file = False
+        self._field_value = b''
+
+    def on_header_field(self, data: bytes, start: int, end: int):
+        self._header_field += data[start:end]
+
+    def on_header_value(self, data: bytes, start: int, end: int):
+        self._header_value += data[start:end]
+
+    def on_header_end(self):
+        self._headers[self._header_field.lower()] = self._header_value
+        self._header_field = b''
+        self._header_value = b''
+
+    def on_headers_finished(self):
+        _, options = parse_options_header(self._headers.get(b'content-disposition', b''))
+        self._part_name = options.get(b'name', b'').decode('latin-1')
+
+        if self._part_name != 'file':
+            return
+        if b'filename' not in options:
+            raise UploadRejectedError(400, "The file field must be a file upload")
+        if self._file is not None:
+            raise UploadRejectedError(400, "Only one PDF file can be uploaded")
+
+        self.filename = options[b'filename'].decode('utf-8', errors='replace')
+        if not self.filename.lower().endswith('.pdf'):
+            raise UploadRejectedError(400, "Only PDF files are allowed")
+
+        self._part_is_file = True
+        self._file = tempfile.NamedTemporaryFile(delete=False, suffix=".pdf", dir=self.upload_dir)
+        self.path = self._file.name
+
+    def on_part_data(self, data: bytes, start: int, end: int):
+        chunk = data[start:end]
+        if not self._part_is_file:
+            self._field_value += chunk
+            if len(self._field_value) > _MAX_FIELD_BYTES:
+                raise UploadRejectedError(400, f"Form field '{self._part_name}' is too long")
+            return
+
+        self.size += len(chunk)
+        if self.size > self.max_bytes:
+            raise UploadRejectedError(413, f"PDF is larger than the {MAX_UPLOAD_MB:g} MB upload limit")
+
+        if not self._header_checked:
+            self._head += chunk
+            if len(self._head) >= _PDF_HEADER_WINDOW:
+                self.check_pdf_header()
+
+        self.digest.update(chunk)
+        self.pending.append(chunk)
+
+    def on_part_end(self):
+        if self._part_is_file:
+            self.check_pdf_header()
+        elif self._part_name:
+            self.fields[self._part_name] = self._field_value.decode('utf-8', errors='replace')
+
+    def check_pdf_header(self):
+        if self._header_checked:
+            return
+        if b'%PDF-' not in self._head[:_PDF_HEADER_WINDOW]:
+            raise UploadRejectedError(400, "The uploaded file is not a PDF")
+        self._header_checked = True
+        self._head = b''
+
+    def write_pending(self):
+        if self.pending:
+            self._file.write(b''.join(self.pending))
+            self.pending = []
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+
+
+def _count_pages(pdf_path: str) -> int:
+    """
+    Read the page count from the PDF's page tree without parsing any page content.
+    """
+    try:
+        reader = PyPDF2.PdfReader(pdf_path, strict=False)
+        if reader.is_encrypted and not reader.decrypt(''):
+            raise UploadRejectedError(400, "The PDF is password protected")
+        return len(reader.pages)
+    except UploadRejectedError:
+        raise
+    except Exception as e:
+        raise UploadRejectedError(400, f"The uploaded PDF is corrupted or unreadable: {e}")
+
+
+async def receive_pdf_upload(request, upload_dir: str) -> PdfUpload:
+    """
+    Stream a multipart/form-data request with a 'file' PDF part straight to a spool file in
+    upload_dir, hashing it on the way.
+
+    The body is parsed as it arrives, so an oversized request is refused from its Content-Length
+    before it is read, and a body that runs past MAX_UPLOAD_MB, a non-PDF file name or a file
+    without a %PDF- header is refused as soon as those bytes come in. The PDF itself is not
+    parsed here: call check_page_count before handing the upload to the pipeline, after any
+    lookup by its hash.
+
+    Raises:
+        UploadRejectedError: With the HTTP status code the upload should be answered with
+    """
+    max_bytes = int(MAX_UPLOAD_MB * 1024 * 1024)
+
+    content_type, options = parse_options_header(request.headers.get('content-type', ''))
+    if content_type != b'multipart/form-data' or b'boundary' not in options:
+        raise UploadRejectedError(400, "Expected a multipart/form-data upload")
+
+    try:
+        content_length = int(request.headers.get('content-length', '0'))
+    except ValueError:
+        raise UploadRejectedError(400, "Invalid Content-Length header")
+    if content_length > max_bytes + _MULTIPART_OVERHEAD:
+        raise UploadRejectedError(413, f"PDF is larger than the {MAX_UPLOAD_MB:g} MB upload limit")
+
+    upload = _UploadParser(upload_dir, max_bytes)
+    parser = MultipartParser(options[b'boundary'], upload.callbacks())
+    received = 0
+
+    try:
+        async for chunk in request.stream():
+            received += len(chunk)
+            if received > max_bytes + _MULTIPART_OVERHEAD:
+                raise UploadRejectedError(413, f"PDF is larger than the {MAX_UPLOAD_MB:g} MB upload limit")
+            try:
+                parser.write(chunk)
+            except MultipartParseError as e:
+                raise UploadRejectedError(400, f"Malformed multipart upload: {e}")
+            # Write the file data without blocking the event loop
+            if upload.pending:
+                await asyncio.to_thread(upload.write_pending)
+        parser.finalize()
+        upload.close()
+
+        if upload.path is None:
+            raise UploadRejectedError(400, "No PDF file in the upload")
+        if upload.size == 0:
+            raise UploadRejectedError(400, "The uploaded PDF is empty")
+
+    except BaseException:
+        upload.close()
+        if upload.path and os.path.exists(upload.path):
+            os.remove(upload.path)
+        raise
+
+    return PdfUpload(upload.path, upload.filename, upload.digest.hexdigest(), upload.size, upload.fields)
+
+
+async def check_page_count(upload: PdfUpload):
+    """
+    Read the upload's page count from the PDF's page tree and check it against MAX_UPLOAD_PAGES.
+    The spool file is left in place either way.
+
+    Raises:
+        UploadRejectedError: When the PDF is unreadable, empty or has too many pages
+    """
+    page_count = await asyncio.to_thread(_count_pages, upload.path)
+    if page_count == 0:
+        raise UploadRejectedError(400, "The uploaded PDF has no pages")
+    if page_count > MAX_UPLOAD_PAGES:
+        raise UploadRejectedError(413, f"PDF has {page_count} pages; at most {MAX_UPLOAD_PAGES} are accepted")
+    upload.page_count = page_count
@@ -0,0 +1,223 @@
+import os
+import queue
+import threading
+import time
+import uuid
+from typing import Optional
+from pipeline import (
+    PIPELINE_STREAMING, PipelineInputError, submit_stage, stage_runs_in_process,
+    extract_pages, translate_pages, render_pages, stream_pages
+)
+
+# Job queue settings
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))
+JOB_QUEUE_SIZE = int(os.getenv("JOB_QUEUE_SIZE", "16"))
+JOB_RESULT_TTL = int(os.getenv("JOB_RESULT_TTL", "3600"))  # seconds to keep finished jobs
+
+
+class JobQueueFullError(Exception):
+    """
+    Raised when a job is submitted while the queue is at capacity.
+    """
+
+
+class Job:
+    """
+    A queued translation of one uploaded PDF and its per-stage progress.
+    """
+
+    def __init__(self, input_path: str, output_path: str, filename: str, source_lang: str, target_lang: str):
+        self.id = uuid.uuid4().hex
+        self.input_path = input_path
+        self.output_path = output_path
+        self.filename = filename
+        self.source_lang = source_lang
+        self.target_lang = target_lang
+
+        self.status = "queued"
+        self.error = None
+        self.error_status_code = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+
+        self.progress = {
+            'pages_extracted': 0,
+            'total_pages': 0,
+            'chunks_translated': 0,
+            'total_chunks': 0,
+            'pages_translated': 0,
+            'pages_rendered': 0,
+        }
+        self._lock = threading.Lock()
+
+    def update_progress(self, **values):
+        with self._lock:
+            self.progress.update(values)
+
+    def to_dict(self) -> dict:
+        with self._lock:
+            return {
+                'job_id': self.id,
+                'filename': self.filename,
+                'source_lang': self.source_lang,
+                'target_lang': self.target_lang,
+                'status': self.status,
+                'error': self.error,
+                'progress': dict(self.progress),
+                'created_at': self.created_at,
+                'started_at': self.started_at,
+                'finished_at': self.finished_at,
+            }
+
+
+class JobManager:
+    """
+    Bounded in-process job queue served by a pool of worker threads.
+    Workers run the same extract, translate and render stages as /translate-pdf/
+    on the shared stage executors.
+    """
+
+    def __init__(self, workers: int = 2, max_queue: int = 16, result_ttl: int = 3600):
+        self.workers = max(1, workers)
+        self.result_ttl = result_ttl
+
+        self._queue = queue.Queue(maxsize=max(1, max_queue))
+        self._jobs = {}
+        self._jobs_lock = threading.Lock()
+        self._threads = []
+        self._stopping = threading.Event()
+
+    def start(self):
+        if self._threads:
+            return
+        self._stopping.clear()
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._worker_loop, name=f"job-worker-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self):
+        self._stopping.set()
+        for thread in self._threads:
+            thread.join(timeout=1)
+        self._threads = []
+
+    def submit(self, input_path: str, output_path: str, filename: str, source_lang: str, target_lang: str) -> Job:
+        """
+        Queue a translation job.
+
+        Raises:
+            JobQueueFullError: if the queue is at capacity
+        """
+        self._cleanup_expired()
+
+        job = Job(input_path, output_path, filename, source_lang, target_lang)
+        try:
+            self._queue.put_nowait(job)
+        except queue.Full:
+            raise JobQueueFullError("Job queue is full, please retry later")
+
+        with self._jobs_lock:
+            self._jobs[job.id] = job
+
+        print(f"Queued job {job.id} ({filename}), queue size {self._queue.qsize()}")
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._jobs_lock:
+            return self._jobs.get(job_id)
+
+    def _worker_loop(self):
+        while not self._stopping.is_set():
+            try:
+                job = self._queue.get(timeout=1)
+            except queue.Empty:
+                continue
+
+            try:
+                self._run_job(job)
+            finally:
+                self._queue.task_done()
+
+    def _run_job(self, job: Job):
+        job.started_at = time.time()
+
+        try:
+            if PIPELINE_STREAMING:
+                self._run_streaming_job(job)
+            else:
+                self._run_staged_job(job)
+
+            job.status = "completed"
+            print(f"Job {job.id} completed")
+
+        except PipelineInputError as e:
+            job.status = "failed"
+            job.error = str(e)
+            job.error_status_code = 400
+        except Exception as e:
+            print(f"Job {job.id} failed: {str(e)}")
+            job.status = "failed"
+            job.error = f"Translation failed: {str(e)}"
+            job.error_status_code = 500
+        finally:
+            job.finished_at = time.time()
+            _remove_file(job.input_path)
+
+    def _run_streaming_job(self, job: Job):
+        # Pages move through all stages at once, so there is a single status for the run
+        job.status = "processing"
+        submit_stage(
+            "stream", stream_pages, job.input_path, job.output_path, job.source_lang, job.target_lang,
+            progress_callback=job.update_progress
+        ).result()
+
+    def _run_staged_job(self, job: Job):
+        job.status = "extracting"
+        extract_kwargs = {}
+        if not stage_runs_in_process("extract"):
+            extract_kwargs['progress_callback'] = lambda done, total: job.update_progress(
+                pages_extracted=done, total_pages=total)
+        pages_data = submit_stage("extract", extract_pages, job.input_path, **extract_kwargs).result()
+        page_count = len(pages_data['pages'])
+        job.update_progress(pages_extracted=page_count, total_pages=page_count)
+
+        job.status = "translating"
+        translated_pages_data = submit_stage(
+            "translate", translate_pages, pages_data, job.source_lang, job.target_lang,
+            progress_callback=lambda done, total: job.update_progress(chunks_translated=done, total_chunks=total)
+        ).result()
+
+        job.status = "rendering"
+        render_kwargs = {'source_pdf_path': job.input_path}
+        if not stage_runs_in_process("render"):
+            render_kwargs['progress_callback'] = lambda done, total: job.update_progress(pages_rendered=done)
+        submit_stage(
+            "render", render_pages, translated_pages_data, job.output_path, job.target_lang, **render_kwargs
+        ).result()
+        job.update_progress(pages_rendered=page_count)
+
+    def _cleanup_expired(self):
+        now = time.time()
+        with self._jobs_lock:
+            expired = [
+                job for job in self._jobs.values()
+                if job.finished_at and now - job.finished_at > self.result_ttl
+            ]
+            for job in expired:
+                del self._jobs[job.id]
+
+        for job in expired:
+            _remove_file(job.output_path)
+
+
+def _remove_file(path: str):
+    if path and os.path.exists(path):
+        try:
+            os.remove(path)
+        except Exception as e:
+            print(f"Error cleaning up file {path}: {e}")
+
+
+job_manager = JobManager(workers=JOB_WORKERS, max_queue=JOB_QUEUE_SIZE, result_ttl=JOB_RESULT_TTL)
@@ -0,0 +1,48 @@
+import os
+
+# Keep per-word positions on extracted lines. Rendering only needs the line text, position
+# and font size, so word detail is dropped unless something downstream asks for it.
+EXTRACT_KEEP_WORDS = os.getenv("EXTRACT_KEEP_WORDS", "false").lower() == "true"
+
+
+class TextWord:
+    """
+    A recognized word and its box in points (top-left origin).
+    """
+
+    __slots__ = ('text', 'x', 'y', 'width', 'height')
+
+    def __init__(self, text: str, x: float, y: float, width: float, height: float):
+        self.text = text
+        self.x = x
+        self.y = y
+        self.width = width
+        self.height = height
+
+    def __repr__(self) -> str:
+        return f"TextWord({self.text!r}, x={self.x:.1f}, y={self.y:.1f})"
+
+
+class TextLine:
+    """
+    A line (or paragraph block) of text on a page: what rendering needs, plus word detail
+    when EXTRACT_KEEP_WORDS is set. width is the space up to the edge of the line's column,
+    and text_width/text_height the extent of the source text; each is 0 when unknown.
+    """
+
+    __slots__ = ('text', 'x', 'y', 'font_size', 'words', 'width', 'text_width', 'text_height')
+
+    def __init__(self, text: str, x: float = 50, y: float = 100, font_size: float = 12, words: tuple = (),
+                 width: float = 0, text_width: float = 0, text_height: float = 0):
+        self.text = text
+        self.x = x
+        self.y = y
+        self.font_size = font_size
+        self.words = words
+        self.width = width
+        self.text_width = text_width
+        self.text_height = text_height
+
+    def __repr__(self) -> str:
+        return f"TextLine({self.text!r}, x={self.x:.1f}, y={self.y:.1f}, font_size={self.font_size:.1f})"
+
@@ -0,0 +1,160 @@
+import os
+import sqlite3
+import threading
+import time
+from typing import Optional
+
+# How many writes between disk size checks
+_EVICTION_CHECK_INTERVAL = 200
+
+
+def select_evictions(entries, total: int, max_bytes: int) -> list:
+    """
+    Pick the entries to evict once total exceeds max_bytes, least recently used first,
+    until the rest fit in 90% of the limit.
+
+    Args:
+        entries: (key, size) pairs, least recently used first
+        total: Size of all entries
+        max_bytes: Size limit
+
+    Returns:
+        Keys of the entries to evict
+    """
+    if total <= max_bytes:
+        return []
+
+    target = int(max_bytes * 0.9)
+    evicted = []
+    for key, size in entries:
+        if total <= target:
+            break
+        evicted.append(key)
+        total -= size
+    return evicted
+
+
+class SQLiteLRUStore:
+    """
+    Keyed rows in an SQLite table, each with its size and time of last use, evicted least
+    recently used first once the stored size grows past max_disk_bytes.
+
+    The table has a 'key' primary key, the given value columns, 'size' and 'last_used'. Each
+    process opens its own connection; callers that keep state alongside the table (such as an
+    in-memory tier) hold 'lock' around it, and may use 'conn' directly while holding it.
+    """
+
+    def __init__(self, db_path: str, table: str, columns: str, name: str,
+                 max_disk_bytes: int = 256 * 1024 * 1024, on_evict=None):
+        """
+        Args:
+            db_path: SQLite file, created along with its directory if missing
+            table: Table name
+            columns: SQL definitions of the value columns, e.g. "data TEXT NOT NULL"
+            name: Name used in log messages
+            max_disk_bytes: Total row size before least recently used rows are evicted
+            on_evict: Optional callable(keys) called with the lock held after rows are evicted
+        """
+        self.db_path = db_path
+        self.table = table
+        self.name = name
+        self.max_disk_bytes = max_disk_bytes
+        self.on_evict = on_evict
+
+        self.lock = threading.RLock()
+        self._writes_since_check = 0
+        self.evictions = 0
+
+        db_dir = os.path.dirname(db_path)
+        if db_dir:
+            os.makedirs(db_dir, exist_ok=True)
+
+        self.conn = sqlite3.connect(db_path, timeout=30, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute(f"""
+            CREATE TABLE IF NOT EXISTS {table} (
+                key TEXT PRIMARY KEY,
+                {columns},
+                size INTEGER NOT NULL,
+                last_used REAL NOT NULL
+            )
+        """)
+        self.conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{table}_last_used ON {table} (last_used)")
+        self.conn.commit()
+
+    def fetch(self, key: str, column: str) -> Optional[str]:
+        """
+        Read one column of a row and mark the row as recently used.
+
+        Returns:
+            The value, or None when there is no such row
+        """
+        with self.lock:
+            row = self.conn.execute(f"SELECT {column} FROM {self.table} WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            self.conn.execute(f"UPDATE {self.table} SET last_used = ? WHERE key = ?", (time.time(), key))
+            self.conn.commit()
+            return row[0]
+
+    def store(self, key: str, values: dict, size: int):
+        """
+        Insert or replace a row, checking the stored size every _EVICTION_CHECK_INTERVAL writes.
+
+        Args:
+            values: Value column name -> value
+            size: Size counted against max_disk_bytes
+        """
+        columns = ', '.join(['key', *values, 'size', 'last_used'])
+        placeholders = ', '.join('?' * (len(values) + 3))
+        with self.lock:
+            self.conn.execute(
+                f"INSERT OR REPLACE INTO {self.table} ({columns}) VALUES ({placeholders})",
+                (key, *values.values(), size, time.time())
+            )
+            self.conn.commit()
+
+            self._writes_since_check += 1
+            if self._writes_since_check >= _EVICTION_CHECK_INTERVAL:
+                self._writes_since_check = 0
+                self.evict()
+
+    def evict(self):
+        """
+        Evict least recently used rows down to 90% of max_disk_bytes once the limit is exceeded.
+        """
+        with self.lock:
+            total = self.conn.execute(f"SELECT COALESCE(SUM(size), 0) FROM {self.table}").fetchone()[0]
+            if total <= self.max_disk_bytes:
+                return
+
+            rows = self.conn.execute(f"SELECT key, size FROM {self.table} ORDER BY last_used ASC")
+            stale_keys = select_evictions(rows, total, self.max_disk_bytes)
+            rows.close()
+
+            self.conn.executemany(f"DELETE FROM {self.table} WHERE key = ?", [(key,) for key in stale_keys])
+            self.conn.commit()
+            if self.on_evict:
+                self.on_evict(stale_keys)
+
+            self.evictions += len(stale_keys)
+            print(f"{self.name} evicted {len(stale_keys)} entries")
+
+    def disk_usage(self) -> tuple:
+        """
+        Returns:
+            (number of rows, total row size)
+        """
+        with self.lock:
+            row = self.conn.execute(f"SELECT COUNT(*), COALESCE(SUM(size), 0) FROM {self.table}").fetchone()
+            return row[0], row[1]
+
+    def clear(self):
+        with self.lock:
+            self.conn.execute(f"DELETE FROM {self.table}")
+            self.conn.commit()
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
@@ -1,12 +1,18 @@
-from fastapi import FastAPI, File, UploadFile, Form, HTTPException
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.responses import FileResponse
 from fastapi.middleware.cors import CORSMiddleware
+import asyncio
 import os
-import tempfile
-from typing import Literal
-import shutil
-from pdf_processor import extract_text_from_pdf, create_translated_pdf_weasyprint
-from translator import translate_text
+from typing import get_args, Literal
+from ingest import UploadRejectedError, check_page_count, receive_pdf_upload
+from pipeline import (
+    PIPELINE_STREAMING, PipelineInputError, submit_stage, shutdown_executors,
+    extract_pages, translate_pages, render_pages, result_signature, stream_pages
+)
+from jobs import JobQueueFullError, job_manager
+from providers import get_provider_stats
+from http_session import close_session
+from result_cache import get_result_cache
 
 app = FastAPI(title="PDF Translator API")
 
@@ -26,156 +32,144 @@ app.add_middleware(
 UPLOAD_DIR = "uploads"
 os.makedirs(UPLOAD_DIR, exist_ok=True)
 
+Language = Literal["en", "hi"]
+
+# Uploads are parsed by receive_pdf_upload rather than FastAPI, so the form is documented here
+PDF_UPLOAD_BODY = {
+    "requestBody": {
+        "required": True,
+        "content": {
+            "multipart/form-data": {
+                "schema": {
+                    "type": "object",
+                    "required": ["file", "source_lang", "target_lang"],
+                    "properties": {
+                        "file": {"type": "string", "format": "binary"},
+                        "source_lang": {"type": "string", "enum": list(get_args(Language))},
+                        "target_lang": {"type": "string", "enum": list(get_args(Language))},
+                    },
+                }
+            }
+        },
+    }
+}
+
+async def _receive_upload(request: Request, count_pages: bool = True) -> tuple:
+    """
+    Stream the uploaded PDF to the uploads directory and validate the language selection.
+    Bad uploads are answered with an HTTP error before any pipeline work is queued.
+    With count_pages=False the caller checks the page count itself, with check_page_count.
+
+    Returns:
+        (PdfUpload, source_lang, target_lang)
+    """
+    try:
+        upload = await receive_pdf_upload(request, UPLOAD_DIR)
+    except UploadRejectedError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
+
+    source_lang = upload.fields.get("source_lang")
+    target_lang = upload.fields.get("target_lang")
+    error = None
+
+    # Validate language selection
+    if source_lang not in get_args(Language) or target_lang not in get_args(Language):
+        error = HTTPException(status_code=422, detail="source_lang and target_lang must be 'en' or 'hi'")
+    elif source_lang == target_lang:
+        error = HTTPException(status_code=400, detail="Source and target languages must be different")
+
+    if not error and count_pages:
+        try:
+            await check_page_count(upload)
+        except UploadRejectedError as e:
+            error = HTTPException(status_code=e.status_code, detail=e.detail)
+
+    if error:
+        os.remove(upload.path)
+        raise error
+
+    return upload, source_lang, target_lang
+
+def _cache_result(cache_key: str, output_pdf_path: str):
+    try:
+        get_result_cache().put(cache_key, output_pdf_path)
+    except Exception as e:
+        print(f"Error caching translated PDF: {e}")
+
+def _pdf_response(pdf_path: str, filename: str) -> FileResponse:
+    return FileResponse(
+        pdf_path,
+        media_type="application/pdf",
+        filename=f"translated_{filename}",
+        headers={
+            "Content-Disposition": f'attachment; filename="translated_{filename}"'
+        }
+    )
+
 @app.get("/")
 async def root():
     return {"message": "PDF Translator API is running"}
 
-@app.post("/translate-pdf/")
-async def translate_pdf(
-    file: UploadFile = File(...),
-    source_lang: Literal["en", "hi"] = Form(...),
-    target_lang: Literal["en", "hi"] = Form(...)
-):
+@app.post("/translate-pdf/", openapi_extra=PDF_UPLOAD_BODY)
+async def translate_pdf(request: Request):
     """
     Translate a PDF file from source language to target language.
     Supported languages: 'en' (English), 'hi' (Hindi)
+    Form fields: file (PDF), source_lang, target_lang
     """
 
-    # Validate file type
-    if not file.filename.endswith('.pdf'):
-        raise HTTPException(status_code=400, detail="Only PDF files are allowed")
-
-    # Validate language selection
-    if source_lang == target_lang:
-        raise HTTPException(status_code=400, detail="Source and target languages must be different")
-
-    # Create temporary file for uploaded PDF
-    with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf", dir=UPLOAD_DIR) as temp_input:
-        shutil.copyfileobj(file.file, temp_input)
-        input_pdf_path = temp_input.name
+    # Stream the upload to a temporary file, rejecting oversized or invalid PDFs early
+    upload, source_lang, target_lang = await _receive_upload(request, count_pages=False)
+    input_pdf_path = upload.path
 
     try:
-        # Extract text from PDF with page structure
-        print(f"Extracting text from PDF: {input_pdf_path}")
-        pages_data = extract_text_from_pdf(input_pdf_path)
-
-        if not pages_data.get('pages'):
-            raise HTTPException(status_code=400, detail="Could not extract text from PDF. The PDF might be empty, encrypted, or corrupted.")
-
-        # Get all text for translation
-        all_text = "\n\n".join([page.get('text', '') for page in pages_data['pages']])
-
-        if not all_text.strip():
-            raise HTTPException(status_code=400, detail="No text content found in PDF. The PDF may contain only images without embedded text. Please ensure the PDF contains extractable text.")
-
-        print(f"Extracted text length: {len(all_text)} characters")
-
-        # Translate text
-        print(f"Translating from {source_lang} to {target_lang}")
-        translated_text = translate_text(all_text, source_lang=source_lang, target_lang=target_lang)
-
-        print(f"Translated text length: {len(translated_text)} characters")
-
-        # Split translated text back to lines matching original structure
-        pages = pages_data['pages']
-
-        # Split translated text by pages first
-        original_page_texts = [page['text'] for page in pages]
-        original_lengths = [len(text) for text in original_page_texts]
-        total_original = sum(original_lengths)
-
-        # Split translated text proportionally by pages
-        translated_page_texts = []
-        current_pos = 0
-
-        for i in range(len(pages)):
-            if i < len(pages) - 1:
-                proportion = original_lengths[i] / total_original
-                page_length = int(len(translated_text) * proportion)
-                page_text = translated_text[current_pos:current_pos + page_length]
-                current_pos += page_length
-            else:
-                page_text = translated_text[current_pos:]
-
-            translated_page_texts.append(page_text)
-
-        # Now match translated text to original line structure
-        translated_pages = []
-
-        for page_idx, page in enumerate(pages):
-            page_translated_text = translated_page_texts[page_idx]
-            original_lines = page['lines']
-
-            # Split translated text for this page into lines matching original structure
-            if not original_lines:
-                translated_pages.append(page)
-                continue
-
-            # Calculate how much translated text each line should get (proportional)
-            original_line_lengths = [len(line.get('text', '')) if isinstance(line, dict) else len(str(line)) for line in original_lines]
-            total_page_length = sum(original_line_lengths) or 1
-
-            translated_lines = []
-            text_pos = 0
-
-            for line_idx, original_line in enumerate(original_lines):
-                # Get original line properties
-                if isinstance(original_line, dict):
-                    line_proportion = original_line_lengths[line_idx] / total_page_length
-                    line_text_length = int(len(page_translated_text) * line_proportion)
-
-                    # Get translated text for this line
-                    if line_idx < len(original_lines) - 1:
-                        line_translated_text = page_translated_text[text_pos:text_pos + line_text_length]
-                        text_pos += line_text_length
-                    else:
-                        line_translated_text = page_translated_text[text_pos:]
-
-                    # Create new line with same position but translated text
-                    translated_lines.append({
-                        'text': line_translated_text.strip(),
-                        'x': original_line.get('x', 50),
-                        'y': original_line.get('y', 100),
-                        'font_size': original_line.get('font_size', 12),
-                        'words': []
-                    })
-                else:
-                    # Fallback for non-dict lines
-                    translated_lines.append({
-                        'text': page_translated_text,
-                        'x': 50,
-                        'y': 100,
-                        'font_size': 12,
-                        'words': []
-                    })
-                    break
-
-            translated_pages.append({
-                'page_num': page['page_num'],
-                'text': page_translated_text,
-                'lines': translated_lines,
-                'width': page['width'],
-                'height': page['height']
-            })
-
-        # Create new pages data structure
-        translated_pages_data = {'pages': translated_pages}
-
-        # Create output PDF with translated text using weasyprint
+        # Repeat uploads of the same document are answered from the result cache without parsing
+        result_cache = get_result_cache()
+        cache_key = None
+        if result_cache:
+            cache_key = result_cache.make_key(upload.sha256, source_lang, target_lang, result_signature())
+            cached_pdf_path = await asyncio.to_thread(result_cache.get, cache_key)
+            if cached_pdf_path:
+                print(f"Serving cached translation of {upload.filename}")
+                return _pdf_response(cached_pdf_path, upload.filename)
+
+        # Only a cache miss reads the page tree
+        await check_page_count(upload)
+
         output_pdf_path = os.path.join(UPLOAD_DIR, f"translated_{os.path.basename(input_pdf_path)}")
-        print(f"Creating translated PDF: {output_pdf_path}")
 
-        create_translated_pdf_weasyprint(translated_pages_data, output_pdf_path, target_lang=target_lang)
+        # Run the blocking stages on their executors so the event loop stays responsive
+        if PIPELINE_STREAMING:
+            summary = await asyncio.wrap_future(
+                submit_stage("stream", stream_pages, input_pdf_path, output_pdf_path, source_lang, target_lang)
+            )
+        else:
+            pages_data = await asyncio.wrap_future(submit_stage("extract", extract_pages, input_pdf_path))
+
+            translated_pages_data = await asyncio.wrap_future(
+                submit_stage("translate", translate_pages, pages_data, source_lang, target_lang)
+            )
+            summary = translated_pages_data
+
+            # Create output PDF with translated text using weasyprint
+            await asyncio.wrap_future(
+                submit_stage("render", render_pages, translated_pages_data, output_pdf_path, target_lang,
+                             source_pdf_path=input_pdf_path)
+            )
+
+        # Lines no provider could translate keep their source text and pages whose OCR failed keep
+        # none; don't serve such a result again
+        if cache_key and not summary['failed_segments'] and not summary['ocr_failed_pages']:
+            await asyncio.to_thread(_cache_result, cache_key, output_pdf_path)
 
         # Return the translated PDF
-        return FileResponse(
-            output_pdf_path,
-            media_type="application/pdf",
-            filename=f"translated_{file.filename}",
-            headers={
-                "Content-Disposition": f'attachment; filename="translated_{file.filename}"'
-            }
-        )
+        return _pdf_response(output_pdf_path, upload.filename)
+
+    except UploadRejectedError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
+
+    except PipelineInputError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
     except Exception as e:
         print(f"Error during translation: {str(e)}")
@@ -189,10 +183,79 @@ async def translate_pdf(
             except Exception as e:
                 print(f"Error cleaning up input file: {e}")
 
+@app.post("/jobs/", status_code=202, openapi_extra=PDF_UPLOAD_BODY)
+async def submit_translation_job(request: Request):
+    """
+    Queue a PDF for translation and return a job id immediately.
+    Poll /jobs/{job_id} for progress and fetch the result from /jobs/{job_id}/download.
+    Form fields: file (PDF), source_lang, target_lang
+    """
+
+    upload, source_lang, target_lang = await _receive_upload(request)
+    input_pdf_path = upload.path
+    output_pdf_path = os.path.join(UPLOAD_DIR, f"translated_{os.path.basename(input_pdf_path)}")
+
+    try:
+        job = job_manager.submit(input_pdf_path, output_pdf_path, upload.filename, source_lang, target_lang)
+    except JobQueueFullError as e:
+        os.remove(input_pdf_path)
+        raise HTTPException(status_code=503, detail=str(e))
+
+    return {
+        "job_id": job.id,
+        "status": job.status,
+        "status_url": f"/jobs/{job.id}",
+        "download_url": f"/jobs/{job.id}/download"
+    }
+
+@app.get("/jobs/{job_id}")
+async def get_translation_job(job_id: str):
+    """
+    Report the status and per-stage progress of a translation job.
+    """
+    job = job_manager.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job.to_dict()
+
+@app.get("/jobs/{job_id}/download")
+async def download_translation_job(job_id: str):
+    """
+    Download the translated PDF of a completed job.
+    """
+    job = job_manager.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    if job.status == "failed":
+        raise HTTPException(status_code=job.error_status_code or 500, detail=job.error)
+
+    if job.status != "completed" or not os.path.exists(job.output_path):
+        raise HTTPException(status_code=409, detail=f"Job is not finished yet (status: {job.status})")
+
+    return _pdf_response(job.output_path, job.filename)
+
+@app.on_event("startup")
+def start_job_workers():
+    job_manager.start()
+
+@app.on_event("shutdown")
+def shutdown_pipeline():
+    job_manager.stop()
+    shutdown_executors()
+    close_session()
+
 @app.get("/health")
 async def health_check():
     return {"status": "healthy"}
 
+@app.get("/providers")
+async def provider_status():
+    """
+    Circuit breaker state and rolling latency/error statistics per translation provider.
+    """
+    return get_provider_stats()
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
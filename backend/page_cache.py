@@ -0,0 +1,143 @@
+import json
+import os
+import threading
+from typing import Optional
+from layout import TextLine, TextWord
+from lru_store import SQLiteLRUStore
+
+# Extracted page cache settings
+PAGE_CACHE_ENABLED = os.getenv("PAGE_CACHE_ENABLED", "true").lower() == "true"
+PAGE_CACHE_PATH = os.getenv("PAGE_CACHE_PATH", "cache/page_cache.db")
+PAGE_CACHE_MAX_MB = float(os.getenv("PAGE_CACHE_MAX_MB", "256"))  # on-disk size
+
+
+def encode_page(page_data: dict) -> str:
+    """
+    Serialize an extracted page (without its page number) to compact JSON.
+    """
+    lines = []
+    for line in page_data['lines']:
+        encoded = [line.text, line.x, line.y, line.font_size, line.width, line.text_width, line.text_height]
+        if line.words:
+            encoded.append([[w.text, w.x, w.y, w.width, w.height] for w in line.words])
+        lines.append(encoded)
+    return json.dumps({'text': page_data['text'], 'lines': lines,
+                       'width': page_data['width'], 'height': page_data['height']}, separators=(',', ':'))
+
+
+def decode_page(data: str, page_num: int) -> dict:
+    """
+    Rebuild an extracted page from encode_page output.
+
+    Args:
+        data: JSON written by encode_page
+        page_num: 1-based number of the page in the current document
+    """
+    page = json.loads(data)
+    lines = []
+    for encoded in page['lines']:
+        words = tuple(TextWord(*word) for word in encoded[7]) if len(encoded) > 7 else ()
+        lines.append(TextLine(encoded[0], encoded[1], encoded[2], encoded[3], words, encoded[4], encoded[5], encoded[6]))
+    return {
+        'page_num': page_num,
+        'text': page['text'],
+        'lines': lines,
+        'width': page['width'],
+        'height': page['height']
+    }
+
+
+class PageCache:
+    """
+    SQLite store of extracted pages, keyed by a fingerprint of each page's content.
+
+    Pages that recur across uploads (standard annexes, terms pages, letterheads) are read
+    from here instead of being laid out by pdfplumber or recognized by Tesseract again.
+    Each worker process opens its own connection to the same file.
+    """
+
+    def __init__(self, db_path: str, max_disk_bytes: int = 256 * 1024 * 1024):
+        self.db_path = db_path
+        self.max_disk_bytes = max_disk_bytes
+
+        self.hits = 0
+        self.misses = 0
+
+        self._store = SQLiteLRUStore(db_path, "pages", "data TEXT NOT NULL", name="Page cache",
+                                     max_disk_bytes=max_disk_bytes)
+        self._lock = self._store.lock
+
+    @property
+    def evictions(self) -> int:
+        return self._store.evictions
+
+    def get(self, key: str, page_num: int) -> Optional[dict]:
+        """
+        Look up an extracted page.
+
+        Args:
+            key: Page fingerprint
+            page_num: 1-based number of the page in the current document
+
+        Returns:
+            The page dictionary, or None on a miss
+        """
+        with self._lock:
+            data = self._store.fetch(key, "data")
+            if data is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+
+        return decode_page(data, page_num)
+
+    def put(self, key: str, page_data: dict):
+        """
+        Store an extracted page.
+        """
+        data = encode_page(page_data)
+        self._store.store(key, {'data': data}, len(data))
+
+    def stats(self) -> dict:
+        with self._lock:
+            entries, disk_bytes = self._store.disk_usage()
+            lookups = self.hits + self.misses
+            return {
+                'entries': entries,
+                'disk_bytes': disk_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+            }
+
+    def clear(self):
+        self._store.clear()
+
+    def close(self):
+        self._store.close()
+
+
+_page_cache = None
+_page_cache_pid = None
+_page_cache_lock = threading.Lock()
+
+
+def get_page_cache() -> Optional[PageCache]:
+    """
+    Return this process's page cache, or None when it is disabled or unavailable.
+    A forked worker process opens its own connection rather than sharing its parent's.
+    """
+    global _page_cache, _page_cache_pid
+    if not PAGE_CACHE_ENABLED:
+        return None
+
+    with _page_cache_lock:
+        if _page_cache is None or _page_cache_pid != os.getpid():
+            try:
+                _page_cache = PageCache(PAGE_CACHE_PATH, max_disk_bytes=int(PAGE_CACHE_MAX_MB * 1024 * 1024))
+                _page_cache_pid = os.getpid()
+            except Exception as e:
+                print(f"Page cache unavailable: {e}")
+                return None
+        return _page_cache
@@ -1,19 +1,86 @@
 import PyPDF2
 import pdfplumber
-from reportlab.lib.pagesizes import letter, A4
 from reportlab.pdfgen import canvas
 from reportlab.pdfbase import pdfmetrics
-from reportlab.pdfbase.ttfonts import TTFont
-from reportlab.lib.utils import simpleSplit
+from reportlab.pdfbase.ttfonts import TTFont, SUBSETN
+import hashlib
+import io
 import os
-import textwrap
+import shutil
+import tempfile
 import re
+import threading
 import unicodedata
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
 from weasyprint import HTML, CSS
+from weasyprint.text.fonts import FontConfiguration
 import html as html_module
 import pytesseract
-from pdf2image import convert_from_path
+from pdf2image import convert_from_path, pdfinfo_from_path
 from PIL import Image
+import numpy as np
+from pdfminer.pdftypes import PDFObjRef, PDFStream
+from layout import EXTRACT_KEEP_WORDS, TextLine, TextWord
+from page_cache import get_page_cache
+
+try:
+    import uharfbuzz as hb  # Devanagari shaping for the ReportLab renderer
+except ImportError:
+    hb = None
+
+# Processes used for page-parallel extraction (0 = one per CPU core)
+EXTRACT_PROCESSES = int(os.getenv("EXTRACT_PROCESSES", "0"))
+# Documents with fewer pages are extracted serially, where process startup would dominate
+PARALLEL_EXTRACT_MIN_PAGES = int(os.getenv("PARALLEL_EXTRACT_MIN_PAGES", "50"))
+
+# OCR rasterization resolution and number of pages held in memory at once
+OCR_DPI = int(os.getenv("OCR_DPI", "300"))
+OCR_PAGE_WINDOW = int(os.getenv("OCR_PAGE_WINDOW", "1"))
+
+# OCR worker processes (0 = one per CPU core, 1 = serial) and OpenMP threads per
+# Tesseract process (0 = divide the CPU cores between the workers)
+OCR_WORKERS = int(os.getenv("OCR_WORKERS", "0"))
+OCR_THREAD_LIMIT = int(os.getenv("OCR_THREAD_LIMIT", "0"))
+
+# Adaptive OCR: read pages at OCR_LOW_DPI and re-read lines whose mean Tesseract
+# confidence is below OCR_CONF_THRESHOLD at OCR_HIGH_DPI
+OCR_ADAPTIVE = os.getenv("OCR_ADAPTIVE", "false").lower() == "true"
+OCR_LOW_DPI = int(os.getenv("OCR_LOW_DPI", "150"))
+OCR_HIGH_DPI = int(os.getenv("OCR_HIGH_DPI", str(OCR_DPI)))
+OCR_CONF_THRESHOLD = float(os.getenv("OCR_CONF_THRESHOLD", "70"))
+# Tesseract confidence below which recognized words are left out of the extracted text
+OCR_MIN_WORD_CONF = 30
+# Image preprocessing before OCR: none, grayscale or binarize
+OCR_PREPROCESS = os.getenv("OCR_PREPROCESS", "none").lower()
+
+# Pages with fewer text characters than this whose images cover at least
+# OCR_IMAGE_COVERAGE of the page are treated as scanned and OCRed
+OCR_MIN_TEXT_CHARS = int(os.getenv("OCR_MIN_TEXT_CHARS", "200"))
+OCR_IMAGE_COVERAGE = float(os.getenv("OCR_IMAGE_COVERAGE", "0.5"))
+
+# Grouping of extracted words into lines, columns and paragraph blocks
+LINE_Y_TOLERANCE = float(os.getenv("LINE_Y_TOLERANCE", "3"))  # points between baselines of one line
+COLUMN_GAP = float(os.getenv("COLUMN_GAP", "12"))  # minimum gutter width in points
+MIN_COLUMN_LINES = int(os.getenv("MIN_COLUMN_LINES", "3"))  # lines needed on each side of a gutter
+EXTRACT_BLOCKS = os.getenv("EXTRACT_BLOCKS", "true").lower() == "true"  # merge paragraph lines
+
+# Part of the page cache key: bump when a change to extraction or OCR changes the extracted pages
+EXTRACTOR_VERSION = "2"
+
+# Pages laid out per WeasyPrint pass (0 = the whole document at once)
+RENDER_BATCH_PAGES = int(os.getenv("RENDER_BATCH_PAGES", "0"))
+HINDI_FONT_PATH = "fonts/NotoSansDevanagari-Regular.ttf"
+# Shaped strings and measured word widths cached by the ReportLab renderer
+SHAPE_CACHE_SIZE = int(os.getenv("SHAPE_CACHE_SIZE", "50000"))
+TEXT_WIDTH_CACHE_SIZE = int(os.getenv("TEXT_WIDTH_CACHE_SIZE", "50000"))
+
+# Processes used for page-parallel rendering (0 = one per CPU core, 1 disables). Each process
+# renders a part with its own font subset, so parallel rendering trades output size for speed.
+RENDER_PROCESSES = int(os.getenv("RENDER_PROCESSES", "1"))
+# Documents with fewer pages are rendered in a single process
+PARALLEL_RENDER_MIN_PAGES = int(os.getenv("PARALLEL_RENDER_MIN_PAGES", "20"))
 
 def normalize_devanagari_text(text: str) -> str:
     """
@@ -35,13 +102,350 @@ def normalize_devanagari_text(text: str) -> str:
 
     return normalized_text
 
-def extract_text_with_ocr(pdf_path: str) -> dict:
+def _preprocess_ocr_image(image):
+    """
+    Apply the configured OCR_PREPROCESS step: 'grayscale', 'binarize' (grayscale plus an
+    Otsu threshold) or 'none'. Returns a new image, or the original one when unchanged.
+    """
+    if OCR_PREPROCESS not in ('grayscale', 'binarize'):
+        return image
+
+    gray = image.convert('L')
+    if OCR_PREPROCESS == 'grayscale':
+        return gray
+
+    # Otsu threshold from the grayscale histogram
+    histogram = gray.histogram()
+    total = sum(histogram)
+    weighted_sum = sum(i * count for i, count in enumerate(histogram))
+    background_count = 0
+    background_sum = 0
+    best_threshold = 127
+    best_variance = 0.0
+
+    for i, count in enumerate(histogram):
+        background_count += count
+        if background_count == 0:
+            continue
+        foreground_count = total - background_count
+        if foreground_count == 0:
+            break
+        background_sum += i * count
+        background_mean = background_sum / background_count
+        foreground_mean = (weighted_sum - background_sum) / foreground_count
+        variance = background_count * foreground_count * (background_mean - foreground_mean) ** 2
+        if variance > best_variance:
+            best_variance = variance
+            best_threshold = i
+
+    binary = gray.point(lambda v: 255 if v > best_threshold else 0)
+    gray.close()
+    return binary
+
+def _ocr_lines(image, dpi: int, config: str = '--psm 1', offset_x: float = 0, offset_y: float = 0,
+               min_conf: int = OCR_MIN_WORD_CONF) -> list:
+    """
+    Run Tesseract on an image and group the recognized words into lines.
+
+    Args:
+        image: PIL image (a whole page or a region of one)
+        dpi: Resolution the image was rasterized at
+        config: Tesseract configuration
+        offset_x, offset_y: Position of the image on the page in points
+        min_conf: Words recognized with lower confidence are skipped
+
+    Returns:
+        List of lines, each a list of word dicts with positions in points and confidence
+    """
+    # Use Tesseract to extract text with layout information
+    ocr_data = pytesseract.image_to_data(image, output_type=pytesseract.Output.DICT, config=config)
+
+    # Group words into lines based on their positions
+    lines = []
+    current_line = []
+    current_line_num = -1
+
+    for i in range(len(ocr_data['text'])):
+        text = ocr_data['text'][i].strip()
+        if not text:
+            continue
+
+        conf = int(float(ocr_data['conf'][i]))
+        if conf < min_conf:  # Skip low-confidence words
+            continue
+
+        line_num = ocr_data['line_num'][i]
+
+        # If we're on a new line, save the previous one
+        if line_num != current_line_num and current_line:
+            lines.append(current_line)
+            current_line = []
+
+        current_line_num = line_num
+
+        # Convert pixel coordinates to points (1 inch = 72 points)
+        x = offset_x + (ocr_data['left'][i] / dpi) * 72
+        y = offset_y + (ocr_data['top'][i] / dpi) * 72
+        width = (ocr_data['width'][i] / dpi) * 72
+        height = (ocr_data['height'][i] / dpi) * 72
+
+        current_line.append({
+            'text': text,
+            'x': x,
+            'y': y,
+            'width': width,
+            'height': height,
+            'conf': conf
+        })
+
+    # Add the last line
+    if current_line:
+        lines.append(current_line)
+
+    return lines
+
+def _build_ocr_page(lines: list, page_num: int, page_width_pt: float, page_height_pt: float) -> dict:
+    """
+    Convert OCR lines to the page dictionary shape returned by extract_text_with_ocr.
+    """
+    structured_lines = []
+    all_text = []
+
+    for line in lines:
+        if not line:
+            continue
+
+        # Combine words in the line
+        line_text = ' '.join([w['text'] for w in line])
+        line_x = min([w['x'] for w in line])
+        line_y = line[0]['y']
+
+        # Estimate font size from word heights
+        avg_height = sum([w['height'] for w in line]) / len(line)
+
+        words = ()
+        if EXTRACT_KEEP_WORDS:
+            words = tuple(TextWord(w['text'], w['x'], w['y'], w['width'], w['height']) for w in line)
+
+        structured_lines.append(TextLine(
+            line_text,
+            line_x,
+            line_y,
+            avg_height * 0.75,  # Approximate font size
+            words,
+            text_width=max([w['x'] + w['width'] for w in line]) - line_x,
+            text_height=max([w['y'] + w['height'] for w in line]) - line_y
+        ))
+        all_text.append(line_text)
+
+    print(f"OCR extracted page {page_num + 1}: {len(structured_lines)} lines, {page_width_pt:.1f}x{page_height_pt:.1f}pt")
+
+    return {
+        'page_num': page_num + 1,
+        'text': '\n'.join(all_text),
+        'lines': structured_lines,
+        'width': page_width_pt,
+        'height': page_height_pt
+    }
+
+def _ocr_page_image(image, page_num: int, dpi: int) -> dict:
+    """
+    Run Tesseract on one rasterized page and group the recognized words into lines.
+
+    Args:
+        image: PIL image of the page
+        page_num: Zero-based page index
+        dpi: Resolution the page was rasterized at
+
+    Returns:
+        Page dictionary in the shape returned by extract_text_with_ocr
+    """
+    prepared = _preprocess_ocr_image(image)
+    try:
+        # Using --psm 1 for automatic page segmentation with OSD (Orientation and Script Detection)
+        lines = _ocr_lines(prepared, dpi)
+    finally:
+        if prepared is not image:
+            prepared.close()
+
+    # Get page dimensions from the image
+    page_width, page_height = image.size
+    return _build_ocr_page(lines, page_num, (page_width / dpi) * 72, (page_height / dpi) * 72)
+
+def _line_confidence(line: list) -> float:
+    return sum(w['conf'] for w in line) / len(line) if line else 0.0
+
+def _drop_low_confidence_words(lines: list) -> list:
+    return [[w for w in line if w['conf'] >= OCR_MIN_WORD_CONF] for line in lines]
+
+def _rasterize_page(pdf_path: str, page_num: int, dpi: int):
+    images = convert_from_path(pdf_path, dpi=dpi, first_page=page_num + 1, last_page=page_num + 1)
+    return images.pop()
+
+def _ocr_page_adaptive(pdf_path: str, page_num: int) -> dict:
+    """
+    OCR a page at OCR_LOW_DPI first, then re-render it at OCR_HIGH_DPI and re-recognize
+    only the lines whose mean confidence is below OCR_CONF_THRESHOLD.
+    A page with no text at all at low resolution is re-read entirely at high resolution.
+
+    Words below OCR_MIN_WORD_CONF are kept until the lines have been re-read, so a line made
+    only of such words at low resolution is re-read rather than lost.
+    """
+    image = _rasterize_page(pdf_path, page_num, OCR_LOW_DPI)
+    try:
+        page_width, page_height = image.size
+        page_width_pt = (page_width / OCR_LOW_DPI) * 72
+        page_height_pt = (page_height / OCR_LOW_DPI) * 72
+        prepared = _preprocess_ocr_image(image)
+        try:
+            lines = _ocr_lines(prepared, OCR_LOW_DPI, min_conf=0)
+        finally:
+            if prepared is not image:
+                prepared.close()
+    finally:
+        image.close()
+
+    low_confidence = [i for i, line in enumerate(lines) if _line_confidence(line) < OCR_CONF_THRESHOLD]
+    if lines and not low_confidence:
+        return _build_ocr_page(_drop_low_confidence_words(lines), page_num, page_width_pt, page_height_pt)
+
+    image = _rasterize_page(pdf_path, page_num, OCR_HIGH_DPI)
+    try:
+        prepared = _preprocess_ocr_image(image)
+        try:
+            if not lines:
+                print(f"OCR page {page_num + 1}: no text at {OCR_LOW_DPI} DPI, retrying at {OCR_HIGH_DPI} DPI")
+                lines = _ocr_lines(prepared, OCR_HIGH_DPI)
+            else:
+                print(f"OCR page {page_num + 1}: re-reading {len(low_confidence)} low-confidence lines at {OCR_HIGH_DPI} DPI")
+                scale = OCR_HIGH_DPI / 72
+                padding = 4  # points around each line
+                for i in low_confidence:
+                    line = lines[i]
+                    left = max(0.0, min(w['x'] for w in line) - padding)
+                    top = max(0.0, min(w['y'] for w in line) - padding)
+                    right = min(page_width_pt, max(w['x'] + w['width'] for w in line) + padding)
+                    bottom = min(page_height_pt, max(w['y'] + w['height'] for w in line) + padding)
+
+                    region = prepared.crop((int(left * scale), int(top * scale), int(right * scale), int(bottom * scale)))
+                    try:
+                        # --psm 7 treats the region as a single text line
+                        region_lines = _ocr_lines(region, OCR_HIGH_DPI, config='--psm 7', offset_x=left, offset_y=top,
+                                                  min_conf=0)
+                    finally:
+                        region.close()
+
+                    region_words = [w for region_line in region_lines for w in region_line]
+                    if region_words and _line_confidence(region_words) > _line_confidence(line):
+                        lines[i] = region_words
+        finally:
+            if prepared is not image:
+                prepared.close()
+    finally:
+        image.close()
+
+    return _build_ocr_page(_drop_low_confidence_words(lines), page_num, page_width_pt, page_height_pt)
+
+def _ocr_page_worker(pdf_path: str, page_num: int, dpi: int) -> dict:
+    """
+    Rasterize and OCR a single page (in an OCR worker process or inline).
+    """
+    if OCR_ADAPTIVE:
+        return _ocr_page_adaptive(pdf_path, page_num)
+
+    image = _rasterize_page(pdf_path, page_num, dpi)
+    try:
+        return _ocr_page_image(image, page_num, dpi)
+    finally:
+        image.close()
+
+def _init_ocr_worker(thread_limit: int):
+    # Tesseract runs as a subprocess and inherits this limit on its OpenMP threads
+    if thread_limit > 0:
+        os.environ['OMP_THREAD_LIMIT'] = str(thread_limit)
+
+def _ocr_worker_count() -> int:
+    return OCR_WORKERS if OCR_WORKERS > 0 else (os.cpu_count() or 1)
+
+def _ocr_thread_limit(workers: int) -> int:
+    """
+    OpenMP threads per Tesseract process. An explicit OCR_THREAD_LIMIT wins; otherwise the
+    cores are divided between the workers so they don't oversubscribe the CPU.
+    """
+    if OCR_THREAD_LIMIT > 0:
+        return OCR_THREAD_LIMIT
+    return max(1, (os.cpu_count() or 1) // workers)
+
+_ocr_pool = None
+_ocr_pool_lock = threading.Lock()
+
+def _get_ocr_pool() -> ProcessPoolExecutor:
+    """
+    Return the shared OCR process pool, creating it on first use.
+    """
+    global _ocr_pool
+    with _ocr_pool_lock:
+        if _ocr_pool is None:
+            workers = _ocr_worker_count()
+            _ocr_pool = ProcessPoolExecutor(
+                max_workers=workers,
+                initializer=_init_ocr_worker,
+                initargs=(_ocr_thread_limit(workers),)
+            )
+        return _ocr_pool
+
+def _ocr_pages_parallel(pdf_path: str, page_numbers: list, progress_callback=None) -> list:
+    """
+    Rasterize and OCR pages on the OCR process pool, one page per task, returning them in page order.
+    """
+    print(f"Running OCR on {len(page_numbers)} pages across {_ocr_worker_count()} processes")
+
+    pool = _get_ocr_pool()
+    futures = [pool.submit(_ocr_page_worker, pdf_path, page_num, OCR_DPI) for page_num in page_numbers]
+
+    pages_data = []
+    for future in futures:
+        pages_data.append(future.result())
+        if progress_callback:
+            progress_callback(len(pages_data), len(page_numbers))
+
+    return pages_data
+
+def _page_windows(page_numbers: list, window: int):
+    """
+    Group sorted zero-based page numbers into runs of consecutive pages at most `window` long.
+
+    Yields:
+        (first_page, last_page) tuples of 1-based page numbers, as pdf2image expects
+    """
+    run_start = None
+    previous = None
+    for page_num in page_numbers:
+        if run_start is not None and (page_num != previous + 1 or page_num - run_start >= window):
+            yield run_start + 1, previous + 1
+            run_start = None
+        if run_start is None:
+            run_start = page_num
+        previous = page_num
+
+    if run_start is not None:
+        yield run_start + 1, previous + 1
+
+def extract_text_with_ocr(pdf_path: str, progress_callback=None, page_numbers: list = None) -> dict:
     """
     Extract text from a PDF using OCR (for image-based/scanned PDFs).
     Uses Tesseract OCR to extract text from PDF pages converted to images.
 
+    With more than one OCR worker, pages are rasterized and recognized in parallel worker
+    processes. Otherwise pages are rasterized OCR_PAGE_WINDOW at a time. Either way each image
+    is released as soon as it has been recognized, so peak memory does not grow with the page count.
+    With OCR_ADAPTIVE, pages are read at a low resolution first and only low-confidence lines
+    are re-read at high resolution.
+
     Args:
         pdf_path: Path to the input PDF file
+        progress_callback: Optional callable(pages_done, total_pages) called after each page
+        page_numbers: Optional zero-based page numbers to OCR (defaults to every page)
 
     Returns:
         Dictionary containing pages with text extracted via OCR
@@ -56,220 +460,843 @@ def extract_text_with_ocr(pdf_path: str) -> dict:
         except Exception:
             raise Exception("Tesseract OCR is not installed. Please install Tesseract to process image-based PDFs. Visit: https://github.com/tesseract-ocr/tesseract")
 
-        # Convert PDF pages to images
-        images = convert_from_path(pdf_path, dpi=300)
+        if page_numbers is None:
+            page_numbers = range(pdfinfo_from_path(pdf_path)['Pages'])
+        page_numbers = sorted(page_numbers)
+        total_pages = len(page_numbers)
+
+        if _ocr_worker_count() > 1 and total_pages > 1:
+            pages_data = _ocr_pages_parallel(pdf_path, page_numbers, progress_callback)
+        elif OCR_ADAPTIVE:
+            # Adaptive OCR rasterizes each page itself, possibly at two resolutions
+            for page_num in page_numbers:
+                pages_data.append(_ocr_page_worker(pdf_path, page_num, OCR_DPI))
+                if progress_callback:
+                    progress_callback(len(pages_data), total_pages)
+        else:
+            window = max(1, OCR_PAGE_WINDOW)
 
-        for page_num, image in enumerate(images):
-            # Use Tesseract to extract text with layout information
-            # Using --psm 1 for automatic page segmentation with OSD (Orientation and Script Detection)
-            ocr_data = pytesseract.image_to_data(image, output_type=pytesseract.Output.DICT, config='--psm 1')
+            for first_page, last_page in _page_windows(page_numbers, window):
+                # Convert only this window of pages to images (pdf2image page numbers are 1-based)
+                images = convert_from_path(pdf_path, dpi=OCR_DPI, first_page=first_page, last_page=last_page)
 
-            # Get page dimensions from the image
-            page_width, page_height = image.size
-            # Convert pixels to points (1 inch = 72 points, DPI=300)
-            page_width_pt = (page_width / 300) * 72
-            page_height_pt = (page_height / 300) * 72
+                page_num = first_page - 1
+                while images:
+                    image = images.pop(0)
+                    try:
+                        pages_data.append(_ocr_page_image(image, page_num, OCR_DPI))
+                    finally:
+                        # Release the raster before moving on to the next page
+                        image.close()
+                        del image
 
-            # Group words into lines based on their positions
-            lines = []
-            current_line = []
-            current_line_num = -1
+                    page_num += 1
+                    if progress_callback:
+                        progress_callback(len(pages_data), total_pages)
 
-            for i in range(len(ocr_data['text'])):
-                text = ocr_data['text'][i].strip()
-                if not text:
-                    continue
+    except Exception as e:
+        raise Exception(f"Error extracting text with OCR: {str(e)}")
 
-                conf = int(ocr_data['conf'][i])
-                if conf < 30:  # Skip low-confidence words
+    return {'pages': pages_data}
+
+def _extract_page_layout(page, page_num: int) -> dict:
+    """
+    Extract the lines of a single pdfplumber page with their positions and font sizes.
+
+    Args:
+        page: pdfplumber page object
+        page_num: Zero-based page index
+
+    Returns:
+        Page dictionary in the shape returned by extract_text_from_pdf
+    """
+    # Get page dimensions
+    page_width = page.width
+    page_height = page.height
+
+    # Extract words with detailed positioning information
+    words = page.extract_words(
+        x_tolerance=3,
+        y_tolerance=3,
+        keep_blank_chars=True,
+        use_text_flow=True
+    )
+
+    # Convert lines to structured format
+    structured_lines = []
+    all_text = []
+
+    for indexes, right_edge in (_group_words(words) if words else []):
+        line = [words[i] for i in indexes]
+
+        line_text = ' '.join([w['text'] for w in line])
+        line_x = min([w['x0'] for w in line])
+        line_y = min([w['top'] for w in line])
+
+        # Estimate font size from word heights
+        avg_height = sum([w['bottom'] - w['top'] for w in line]) / len(line)
+
+        words_detail = ()
+        if EXTRACT_KEEP_WORDS:
+            words_detail = tuple(TextWord(w['text'], w['x0'], w['top'], w['x1'] - w['x0'], w['bottom'] - w['top'])
+                                 for w in line)
+
+        structured_lines.append(TextLine(
+            line_text,
+            line_x,
+            line_y,
+            avg_height * 0.75,  # Approximate font size from height
+            words_detail,
+            right_edge - line_x,
+            max([w['x1'] for w in line]) - line_x,
+            max([w['bottom'] for w in line]) - line_y
+        ))
+        all_text.append(line_text)
+
+    print(f"Extracted page {page_num + 1}: {len(structured_lines)} lines, {page_width}x{page_height}")
+
+    return {
+        'page_num': page_num + 1,
+        'text': '\n'.join(all_text),
+        'lines': structured_lines,
+        'width': page_width,
+        'height': page_height,
+        'needs_ocr': _page_needs_ocr(page, all_text)
+    }
+
+def _group_words(words: list) -> list:
+    """
+    Group a page's words into output lines in reading order, detecting columns and paragraphs.
+
+    Words are sorted by baseline and split into rows where neighbouring baselines differ by more
+    than LINE_Y_TOLERANCE, and rows are split into fragments at gaps too wide to be a word space.
+    Fragments crossing a column gutter (titles, full-width text) divide the page into bands, and
+    each band is read column by column. With EXTRACT_BLOCKS, consecutive lines of a paragraph
+    are merged into a single block.
+
+    Args:
+        words: pdfplumber word dicts
+
+    Returns:
+        List of (word indexes, right edge of the line's column) in reading order
+    """
+    count = len(words)
+    x0 = np.fromiter((w['x0'] for w in words), dtype=float, count=count)
+    x1 = np.fromiter((w['x1'] for w in words), dtype=float, count=count)
+    top = np.fromiter((w['top'] for w in words), dtype=float, count=count)
+    bottom = np.fromiter((w['bottom'] for w in words), dtype=float, count=count)
+
+    # Rows: consecutive baselines within the tolerance
+    order = np.argsort(bottom, kind='stable')
+    rows = np.split(order, np.flatnonzero(np.diff(bottom[order]) > LINE_Y_TOLERANCE) + 1)
+
+    # Fragments: rows split at gaps wider than a word space
+    gap_limit = max(COLUMN_GAP, float(np.median(bottom - top)))
+    fragments = []
+    for row in rows:
+        row = row[np.argsort(x0[row], kind='stable')]
+        gaps = x0[row[1:]] - x1[row[:-1]]
+        fragments.extend(np.split(row, np.flatnonzero(gaps > gap_limit) + 1))
+
+    # Per-fragment bounding boxes in one pass over the concatenated fragments
+    flat = np.concatenate(fragments)
+    starts = np.cumsum([0] + [len(fragment) for fragment in fragments[:-1]])
+    f_x0 = np.minimum.reduceat(x0[flat], starts)
+    f_x1 = np.maximum.reduceat(x1[flat], starts)
+    f_top = np.minimum.reduceat(top[flat], starts)
+    f_bottom = np.maximum.reduceat(bottom[flat], starts)
+    f_height = np.add.reduceat((bottom - top)[flat], starts) / np.diff(np.append(starts, len(flat)))
+
+    # Width of each fragment's first word, for telling wrapped paragraph lines from short lines.
+    # Words keep their blank chars, so estimate it from the share of the first run's text.
+    f_first_width = np.empty(len(fragments))
+    for i, fragment in enumerate(fragments):
+        first = fragment[0]
+        text = words[first]['text'].strip()
+        f_first_width[i] = (x1[first] - x0[first]) * (len(text.split(' ', 1)[0]) / max(len(text), 1))
+
+    gutters = _find_gutters(f_x0, f_x1)
+    spanning = np.zeros(len(fragments), dtype=bool)
+    for gutter in gutters:
+        spanning |= (f_x0 < gutter) & (f_x1 > gutter)
+    column = np.searchsorted(gutters, (f_x0 + f_x1) / 2)
+    content_right = float(f_x1.max())
+
+    # Reading order: bands between spanning fragments, each band column by column
+    runs = []
+    band = []
+    for i in np.argsort(f_top, kind='stable'):
+        if spanning[i]:
+            runs.extend(_band_columns(band, column, len(gutters)))
+            runs.append([i])
+            band = []
+        else:
+            band.append(i)
+    runs.extend(_band_columns(band, column, len(gutters)))
+
+    grouped = []
+    for run in runs:
+        right_edge = content_right if spanning[run[0]] else float(f_x1[run].max())
+
+        blocks = []
+        for i in run:
+            if blocks and EXTRACT_BLOCKS:
+                previous = blocks[-1][-1]
+                height = f_height[previous]
+                continues = (
+                    f_top[i] - f_bottom[previous] <= 0.7 * height
+                    and abs(f_height[i] - height) <= 0.2 * height
+                    and abs(f_x0[i] - f_x0[previous]) <= 2 * height
+                    # The line only broke because its next word did not fit before the column edge
+                    # (with an em of slack for the estimated word width)
+                    and f_x1[previous] + height + f_first_width[i] > right_edge
+                )
+                if continues:
+                    blocks[-1].append(i)
                     continue
+            blocks.append([i])
 
-                line_num = ocr_data['line_num'][i]
+        for block in blocks:
+            grouped.append((np.concatenate([fragments[i] for i in block]), right_edge))
 
-                # If we're on a new line, save the previous one
-                if line_num != current_line_num and current_line:
-                    lines.append(current_line)
-                    current_line = []
+    return grouped
 
-                current_line_num = line_num
+def _band_columns(band: list, column: np.ndarray, gutter_count: int) -> list:
+    """
+    Split a band of fragments (sorted top to bottom) into its columns, left to right.
+    """
+    runs = []
+    for c in range(gutter_count + 1):
+        run = [i for i in band if column[i] == c]
+        if run:
+            runs.append(run)
+    return runs
+
+def _find_gutters(f_x0: np.ndarray, f_x1: np.ndarray) -> np.ndarray:
+    """
+    Find column gutters: x ranges at least COLUMN_GAP wide that no column-sized fragment covers,
+    with at least MIN_COLUMN_LINES fragments on each side and fewer fragments crossing than that.
 
-                # Convert pixel coordinates to points
-                x = (ocr_data['left'][i] / 300) * 72
-                y = (ocr_data['top'][i] / 300) * 72
-                width = (ocr_data['width'][i] / 300) * 72
-                height = (ocr_data['height'][i] / 300) * 72
+    Returns:
+        Sorted x positions of the gutter centres
+    """
+    content_width = float(f_x1.max() - f_x0.min())
+    narrow = (f_x1 - f_x0) < content_width / 2
+    if narrow.sum() < 2 * MIN_COLUMN_LINES:
+        return np.empty(0)
+
+    # Coverage of 1pt bins by narrow fragments, from a difference array
+    left = int(np.floor(f_x0[narrow].min()))
+    right = int(np.ceil(f_x1[narrow].max()))
+    delta = np.zeros(right - left + 1, dtype=int)
+    np.add.at(delta, np.floor(f_x0[narrow]).astype(int) - left, 1)
+    np.add.at(delta, np.ceil(f_x1[narrow]).astype(int) - left, -1)
+    empty = np.cumsum(delta)[:-1] == 0
+
+    edges = np.diff(np.concatenate(([0], empty.astype(int), [0])))
+    gutters = []
+    for run_start, run_end in zip(np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)):
+        if run_end - run_start < COLUMN_GAP:
+            continue
+        gutter = left + (run_start + run_end) / 2
+        left_count = int((f_x1 <= gutter).sum())
+        right_count = int((f_x0 >= gutter).sum())
+        crossing = int(((f_x0 < gutter) & (f_x1 > gutter)).sum())
+        if min(left_count, right_count) >= MIN_COLUMN_LINES and crossing < min(left_count, right_count):
+            gutters.append(gutter)
+
+    return np.array(gutters)
+
+def _page_needs_ocr(page, line_texts: list) -> bool:
+    """
+    Decide whether a page should be OCRed: it has images but no text layer, or it is
+    dominated by images and carries only a little text (e.g. a scanned page with a text footer).
+    A blank page has nothing to read.
+    """
+    text_chars = sum(len(text.strip()) for text in line_texts)
+    if text_chars and text_chars >= OCR_MIN_TEXT_CHARS:
+        return False
 
-                current_line.append({
-                    'text': text,
-                    'x': x,
-                    'y': y,
-                    'width': width,
-                    'height': height
-                })
+    page_area = float(page.width * page.height) or 1.0
+    image_area = 0.0
+    for image in page.images:
+        # Clip each image to the page box before measuring it
+        width = min(float(image['x1']), float(page.width)) - max(float(image['x0']), 0.0)
+        height = min(float(image['bottom']), float(page.height)) - max(float(image['top']), 0.0)
+        if width > 0 and height > 0:
+            image_area += width * height
 
-            # Add the last line
-            if current_line:
-                lines.append(current_line)
+    if text_chars == 0:
+        return image_area > 0
 
-            # Convert lines to structured format
-            structured_lines = []
-            all_text = []
+    return image_area / page_area >= OCR_IMAGE_COVERAGE
 
-            for line in lines:
-                if not line:
-                    continue
+def extraction_version() -> str:
+    """
+    Identify the extractor version and the extraction and OCR settings, so results extracted
+    under other settings are not reused.
+    """
+    return hashlib.sha256(_extraction_signature()).hexdigest()[:16]
+
+def _extraction_signature() -> bytes:
+    # Settings that change what is extracted from a page, so pages cached under other settings are not reused
+    return repr((
+        EXTRACTOR_VERSION, LINE_Y_TOLERANCE, COLUMN_GAP, MIN_COLUMN_LINES, EXTRACT_BLOCKS, EXTRACT_KEEP_WORDS,
+        OCR_DPI, OCR_ADAPTIVE, OCR_LOW_DPI, OCR_HIGH_DPI, OCR_CONF_THRESHOLD, OCR_PREPROCESS,
+        OCR_MIN_TEXT_CHARS, OCR_IMAGE_COVERAGE
+    )).encode('utf-8')
+
+def _pdf_object_digest(obj, object_digests: dict) -> bytes:
+    """
+    SHA-256 of a PDF object and everything it references. Streams are hashed as stored
+    (without decoding), and indirect objects are hashed once per document via object_digests.
+    """
+    if isinstance(obj, PDFObjRef):
+        if obj.objid not in object_digests:
+            # Placeholder in case the object refers back to itself
+            object_digests[obj.objid] = f"ref:{obj.objid}".encode('utf-8')
+            object_digests[obj.objid] = _pdf_object_digest(obj.resolve(), object_digests)
+        return object_digests[obj.objid]
+
+    digest = hashlib.sha256()
+    if isinstance(obj, PDFStream):
+        digest.update(b'stream')
+        digest.update(_pdf_object_digest(obj.attrs, object_digests))
+        data = obj.get_rawdata()
+        digest.update(data if data is not None else obj.get_data())
+    elif isinstance(obj, dict):
+        digest.update(b'dict')
+        for key in sorted(obj):
+            # Parent links lead back up the page tree, which says nothing about this object's content
+            if key != 'Parent':
+                digest.update(str(key).encode('utf-8'))
+                digest.update(_pdf_object_digest(obj[key], object_digests))
+    elif isinstance(obj, (list, tuple)):
+        digest.update(b'list')
+        for item in obj:
+            digest.update(_pdf_object_digest(item, object_digests))
+    else:
+        digest.update(repr(obj).encode('utf-8'))
+    return digest.digest()
 
-                # Combine words in the line
-                line_text = ' '.join([w['text'] for w in line])
-                line_x = min([w['x'] for w in line])
-                line_y = line[0]['y']
-
-                # Estimate font size from word heights
-                avg_height = sum([w['height'] for w in line]) / len(line)
-
-                structured_lines.append({
-                    'text': line_text,
-                    'x': line_x,
-                    'y': line_y,
-                    'font_size': avg_height * 0.75,  # Approximate font size
-                    'words': line
-                })
-                all_text.append(line_text)
-
-            pages_data.append({
-                'page_num': page_num + 1,
-                'text': '\n'.join(all_text),
-                'lines': structured_lines,
-                'width': page_width_pt,
-                'height': page_height_pt
-            })
-            print(f"OCR extracted page {page_num + 1}: {len(structured_lines)} lines, {page_width_pt:.1f}x{page_height_pt:.1f}pt")
+def _page_fingerprint(page, object_digests: dict) -> str:
+    """
+    Key for the page cache: the page's content streams, the fonts and images they use
+    (which covers the raster of a scanned page), its geometry and the extraction settings.
+    """
+    page_obj = page.page_obj
+    digest = hashlib.sha256(_extraction_signature())
+    digest.update(repr((page.bbox, page.rotation, float(page.width), float(page.height))).encode('utf-8'))
+    digest.update(_pdf_object_digest(page_obj.attrs.get('Contents'), object_digests))
+    digest.update(_pdf_object_digest(page_obj.resources, object_digests))
+    return digest.hexdigest()
+
+def _extract_page_cached(page, page_num: int, object_digests: dict) -> dict:
+    """
+    Extract a page, or read it from the page cache when the same page has been seen before.
 
+    Cached pages are final (OCR included). A freshly extracted page that still needs OCR keeps
+    its 'cache_key', so the OCR result can be stored with _cache_page once it is known.
+    The cache is best-effort: when it fails, the page is extracted without it.
+    """
+    page_cache = get_page_cache()
+    if page_cache is None:
+        return _extract_page_layout(page, page_num)
+
+    try:
+        key = _page_fingerprint(page, object_digests)
+        cached_page = page_cache.get(key, page_num + 1)
     except Exception as e:
-        raise Exception(f"Error extracting text with OCR: {str(e)}")
+        print(f"Error reading page cache for page {page_num + 1}: {e}")
+        return _extract_page_layout(page, page_num)
+    if cached_page is not None:
+        return cached_page
+
+    page_data = _extract_page_layout(page, page_num)
+    if page_data['needs_ocr']:
+        page_data['cache_key'] = key
+    else:
+        _cache_page(key, page_data)
+    return page_data
 
-    return {'pages': pages_data}
+def _cache_page(cache_key: str, page_data: dict):
+    page_cache = get_page_cache()
+    if cache_key and page_cache is not None:
+        try:
+            page_cache.put(cache_key, page_data)
+        except Exception as e:
+            print(f"Error writing page cache for page {page_data['page_num']}: {e}")
+
+def _extract_page_range(pdf_path: str, first_page: int, last_page: int) -> list:
+    """
+    Extract pages [first_page, last_page) in a worker process.
+    Each worker opens the PDF itself so only file paths and results cross the process boundary.
+    """
+    pages_data = []
+    object_digests = {}
+    with pdfplumber.open(pdf_path) as pdf:
+        for i in range(first_page, last_page):
+            page = pdf.pages[i]
+            pages_data.append(_extract_page_cached(page, i, object_digests))
+            page.close()
+    return pages_data
+
+_extract_pool = None
+_extract_pool_lock = threading.Lock()
+
+def _get_extract_pool() -> ProcessPoolExecutor:
+    """
+    Return the shared page extraction process pool, creating it on first use.
+    """
+    global _extract_pool
+    with _extract_pool_lock:
+        if _extract_pool is None:
+            _extract_pool = ProcessPoolExecutor(max_workers=_extract_process_count())
+        return _extract_pool
+
+def _extract_process_count() -> int:
+    return EXTRACT_PROCESSES if EXTRACT_PROCESSES > 0 else (os.cpu_count() or 1)
+
+def _extract_pages_parallel(pdf_path: str, total_pages: int, progress_callback=None) -> list:
+    """
+    Split the page range across the extraction process pool and merge results in page order.
+    """
+    workers = _extract_process_count()
+    # Several ranges per worker keeps cores busy when some pages are much heavier than others
+    range_size = max(1, -(-total_pages // (workers * 4)))
+    ranges = [(start, min(start + range_size, total_pages)) for start in range(0, total_pages, range_size)]
+
+    print(f"Extracting {total_pages} pages in {len(ranges)} ranges across {workers} processes")
 
-def extract_text_from_pdf(pdf_path: str) -> dict:
+    pool = _get_extract_pool()
+    futures = [pool.submit(_extract_page_range, pdf_path, start, end) for start, end in ranges]
+
+    pages_data = []
+    for future in futures:
+        pages_data.extend(future.result())
+        if progress_callback:
+            progress_callback(len(pages_data), total_pages)
+
+    return pages_data
+
+def extract_text_from_pdf(pdf_path: str, progress_callback=None, parallel: bool = None) -> dict:
     """
     Extract text from a PDF file with detailed layout information.
     Uses pdfplumber to capture text positions, font sizes, and formatting.
 
     Args:
         pdf_path: Path to the input PDF file
+        progress_callback: Optional callable(pages_done, total_pages) called after each page
+        parallel: Split pages across a process pool. Defaults to doing so for documents
+            with at least PARALLEL_EXTRACT_MIN_PAGES pages when more than one process is available.
 
     Returns:
-        Dictionary containing pages with text elements and their positions
+        Dictionary containing pages with text elements and their positions. Each page's
+        'lines' are TextLine objects; word detail is only kept with EXTRACT_KEEP_WORDS.
+        Pages that needed OCR but could not get it are marked with 'ocr_failed'.
     """
     pages_data = []
     try:
         with pdfplumber.open(pdf_path) as pdf:
-            for page_num, page in enumerate(pdf.pages):
-                # Get page dimensions
-                page_width = page.width
-                page_height = page.height
-
-                # Extract words with detailed positioning information
-                words = page.extract_words(
-                    x_tolerance=3,
-                    y_tolerance=3,
-                    keep_blank_chars=True,
-                    use_text_flow=True
-                )
+            total_pages = len(pdf.pages)
 
-                # Group words into lines based on y-coordinate
-                lines = []
-                if words:
-                    current_line = []
-                    current_y = words[0]['top']
-                    y_tolerance = 3  # pixels tolerance for same line
-
-                    for word in words:
-                        # If word is on roughly the same y-coordinate, add to current line
-                        if abs(word['top'] - current_y) <= y_tolerance:
-                            current_line.append(word)
-                        else:
-                            # Save current line and start new one
-                            if current_line:
-                                lines.append(current_line)
-                            current_line = [word]
-                            current_y = word['top']
-
-                    # Add the last line
-                    if current_line:
-                        lines.append(current_line)
-
-                # Convert lines to structured format
-                structured_lines = []
-                all_text = []
-
-                for line in lines:
-                    if not line:
-                        continue
-
-                    # Get line properties from first word
-                    line_text = ' '.join([w['text'] for w in line])
-                    line_x = min([w['x0'] for w in line])
-                    line_y = line[0]['top']
-
-                    # Estimate font size from word heights
-                    avg_height = sum([w['bottom'] - w['top'] for w in line]) / len(line)
-
-                    structured_lines.append({
-                        'text': line_text,
-                        'x': line_x,
-                        'y': line_y,
-                        'font_size': avg_height * 0.75,  # Approximate font size from height
-                        'words': line
-                    })
-                    all_text.append(line_text)
-
-                pages_data.append({
-                    'page_num': page_num + 1,
-                    'text': '\n'.join(all_text),
-                    'lines': structured_lines,
-                    'width': page_width,
-                    'height': page_height
-                })
-                print(f"Extracted page {page_num + 1}: {len(structured_lines)} lines, {page_width}x{page_height}")
+            if parallel is None:
+                parallel = _extract_process_count() > 1 and total_pages >= PARALLEL_EXTRACT_MIN_PAGES
+
+            if not parallel:
+                object_digests = {}
+                for page_num, page in enumerate(pdf.pages):
+                    pages_data.append(_extract_page_cached(page, page_num, object_digests))
+                    # Release the page's parsed objects once its layout has been extracted
+                    page.close()
+                    if progress_callback:
+                        progress_callback(page_num + 1, total_pages)
+
+        if parallel:
+            pages_data = _extract_pages_parallel(pdf_path, total_pages, progress_callback)
 
     except Exception as e:
         raise Exception(f"Error extracting text from PDF: {str(e)}")
 
+    # OCR only the pages without a usable text layer (scanned or image-dominant pages)
+    ocr_page_numbers = [i for i, page in enumerate(pages_data) if page.pop('needs_ocr', False)]
+    ocr_error = None
+
+    if ocr_page_numbers:
+        print(f"Pages without a usable text layer: {[i + 1 for i in ocr_page_numbers]}, trying OCR...")
+        try:
+            ocr_result = extract_text_with_ocr(pdf_path, page_numbers=ocr_page_numbers)
+            for ocr_page in ocr_result['pages']:
+                page_index = ocr_page['page_num'] - 1
+                cache_key = pages_data[page_index].pop('cache_key', None)
+                # Keep the pdfplumber result if OCR finds nothing on the page
+                if ocr_page['lines']:
+                    pages_data[page_index] = ocr_page
+                _cache_page(cache_key, pages_data[page_index])
+        except Exception as e:
+            ocr_error = e
+            print(f"OCR extraction failed: {str(e)}")
+            for page_index in ocr_page_numbers:
+                pages_data[page_index]['ocr_failed'] = True
+
+    # Pages whose OCR failed are not cached, so they are OCRed again next time
+    for page in pages_data:
+        page.pop('cache_key', None)
+
     # Check if any text was extracted
     total_lines = sum(len(page.get('lines', [])) for page in pages_data)
 
-    # If no text was extracted, try OCR
     if total_lines == 0:
-        print("No text extracted with pdfplumber, trying OCR...")
-        try:
-            ocr_result = extract_text_with_ocr(pdf_path)
-            # Verify OCR actually found text
-            ocr_total_lines = sum(len(page.get('lines', [])) for page in ocr_result.get('pages', []))
-            if ocr_total_lines == 0:
-                raise Exception("OCR found no text content in the PDF")
-            return ocr_result
-        except Exception as ocr_error:
-            print(f"OCR extraction also failed: {str(ocr_error)}")
-            raise Exception(f"Could not extract text from PDF using either pdfplumber or OCR. The PDF may be an image without text, encrypted, or corrupted. OCR error: {str(ocr_error)}")
+        if ocr_error is None:
+            ocr_error = Exception("OCR found no text content in the PDF")
+        raise Exception(f"Could not extract text from PDF using either pdfplumber or OCR. The PDF may be an image without text, encrypted, or corrupted. OCR error: {str(ocr_error)}")
 
     return {'pages': pages_data}
 
-def create_translated_pdf(pages_data: dict, output_path: str, target_lang: str = "en"):
+def iter_pdf_pages(pdf_path: str, progress_callback=None):
+    """
+    Yield extracted pages one at a time, in the same shape as the pages of extract_text_from_pdf,
+    so later stages can start on the first pages while the rest are still being read.
+
+    Documents with at least PARALLEL_EXTRACT_MIN_PAGES pages are extracted a few pages at a time
+    on the extraction process pool, with a bounded number of ranges in flight. Pages without a
+    usable text layer are sent to the OCR pool as soon as they are extracted, and extraction
+    reads ahead while they are recognized, so scanned documents still use every OCR worker.
+    Each pdfplumber page is closed once it has been extracted.
+
+    Args:
+        pdf_path: Path to the input PDF file
+        progress_callback: Optional callable(pages_done, total_pages) called after each page
+    """
+    try:
+        with pdfplumber.open(pdf_path) as pdf:
+            total_pages = len(pdf.pages)
+
+            if _extract_process_count() > 1 and total_pages >= PARALLEL_EXTRACT_MIN_PAGES:
+                pages = _iter_page_ranges(pdf_path, total_pages)
+            else:
+                pages = _iter_pages_serial(pdf)
+
+            yield from _ocr_pages_ahead(pdf_path, pages, total_pages, progress_callback)
+
+    except Exception as e:
+        raise Exception(f"Error extracting text from PDF: {str(e)}")
+
+def _iter_pages_serial(pdf):
+    object_digests = {}
+    for page_num, page in enumerate(pdf.pages):
+        page_data = _extract_page_cached(page, page_num, object_digests)
+        page.close()
+        yield page_data
+
+def _iter_page_ranges(pdf_path: str, total_pages: int):
+    """
+    Extract short page ranges on the extraction process pool and yield their pages in order,
+    keeping two ranges per worker in flight.
+    """
+    workers = _extract_process_count()
+    # Short ranges so the first pages come back quickly
+    range_size = max(1, min(8, -(-total_pages // (workers * 4))))
+    ranges = iter(range(0, total_pages, range_size))
+
+    print(f"Extracting {total_pages} pages in ranges of {range_size} across {workers} processes")
+
+    pool = _get_extract_pool()
+    in_flight = deque()
+    for start in ranges:
+        in_flight.append(pool.submit(_extract_page_range, pdf_path, start, min(start + range_size, total_pages)))
+        if len(in_flight) >= workers * 2:
+            yield from in_flight.popleft().result()
+    while in_flight:
+        yield from in_flight.popleft().result()
+
+def _ocr_pages_ahead(pdf_path: str, pages, total_pages: int, progress_callback=None):
+    """
+    OCR the extracted pages that need it and yield every page in order.
+
+    With more than one OCR worker, pages are submitted to the OCR pool as they arrive and up to
+    two pages per worker are held while recognition runs; otherwise each page is OCRed inline.
+    After the first OCR failure (e.g. Tesseract is not installed) the remaining pages keep
+    their pdfplumber text, and every page left without the OCR it needed is marked with 'ocr_failed'.
+    """
+    ocr_workers = _ocr_worker_count()
+    lookahead = max(1, ocr_workers * 2)
+    pending = deque()  # (page_data, cache_key, needs_ocr, OCR future or None)
+    state = {'ocr_failed': False, 'ocr_checked': ocr_workers <= 1, 'pages_done': 0}
+
+    def ocr_available() -> bool:
+        if not state['ocr_checked']:
+            state['ocr_checked'] = True
+            try:
+                pytesseract.get_tesseract_version()
+            except Exception as e:
+                state['ocr_failed'] = True
+                print(f"OCR extraction failed, continuing without OCR: {str(e)}")
+        return not state['ocr_failed']
+
+    def finish(entry) -> dict:
+        page_data, cache_key, needs_ocr, future = entry
+        if needs_ocr and not state['ocr_failed']:
+            try:
+                if future is not None:
+                    ocr_page = future.result()
+                else:
+                    ocr_page = extract_text_with_ocr(pdf_path, page_numbers=[page_data['page_num'] - 1])['pages'][0]
+                # Keep the pdfplumber result if OCR finds nothing on the page
+                if ocr_page['lines']:
+                    page_data = ocr_page
+                _cache_page(cache_key, page_data)
+            except Exception as e:
+                # Don't retry OCR on every remaining page
+                state['ocr_failed'] = True
+                print(f"OCR extraction failed, continuing without OCR: {str(e)}")
+        if needs_ocr and state['ocr_failed']:
+            page_data['ocr_failed'] = True
+
+        state['pages_done'] += 1
+        if progress_callback:
+            progress_callback(state['pages_done'], total_pages)
+        return page_data
+
+    for page_data in pages:
+        cache_key = page_data.pop('cache_key', None)
+        needs_ocr = page_data.pop('needs_ocr', False)
+        future = None
+        if needs_ocr and ocr_available() and ocr_workers > 1:
+            future = _get_ocr_pool().submit(_ocr_page_worker, pdf_path, page_data['page_num'] - 1, OCR_DPI)
+        pending.append((page_data, cache_key, needs_ocr, future))
+
+        # Hand on pages that are ready; wait for the oldest OCR result only once the window is full
+        while pending and (pending[0][3] is None or pending[0][3].done() or len(pending) >= lookahead):
+            yield finish(pending.popleft())
+
+    while pending:
+        yield finish(pending.popleft())
+
+_reportlab_fonts = {}
+_reportlab_fonts_lock = threading.Lock()
+
+def _get_reportlab_font(target_lang: str) -> tuple:
+    """
+    Return (font name, shaper) for a target language, registering the font once per process.
+    The shaper is None when text is drawn without HarfBuzz shaping.
+    """
+    with _reportlab_fonts_lock:
+        if target_lang not in _reportlab_fonts:
+            font_name = "Helvetica"
+            shaper = None
+            if target_lang == "hi":
+                font_name = register_hindi_font()
+                if font_name != 'Helvetica':
+                    if hb is not None:
+                        shaper = _HarfBuzzShaper(font_name, HINDI_FONT_PATH)
+                    else:
+                        print("uharfbuzz is not installed, Devanagari will be drawn without shaping")
+            _reportlab_fonts[target_lang] = (font_name, shaper)
+        return _reportlab_fonts[target_lang]
+
+class _HarfBuzzShaper:
+    """
+    Shapes text with HarfBuzz so Devanagari conjuncts, reordered vowel signs and mark positions
+    come out right on a ReportLab canvas.
+
+    ReportLab embeds TrueType glyphs by code point, so the glyphs of a cluster that does not map
+    one to one onto its characters (conjuncts, half forms, reordered vowel signs) are drawn with
+    plane 15 private use code points, one per glyph and cluster text. The font's ToUnicode CMap
+    maps those back to the cluster's characters, split across its glyphs in logical order.
+    """
+
+    _PRIVATE_USE_BASE = 0xF0000
+
+    def __init__(self, font_name: str, font_path: str):
+        self.font_name = font_name
+        font = pdfmetrics.getFont(font_name)
+        self.face = font.face
+        self.unicode_text = font.unicode_text
+
+        with open(font_path, 'rb') as font_file:
+            hb_face = hb.Face(hb.Blob(font_file.read()))
+        self.hb_font = hb.Font(hb_face)
+        self.units_per_em = hb_face.upem
+
+        # (glyph id, text) -> private use code point used to draw it
+        self.private_codes = {}
+        self._lock = threading.Lock()
+
+        self.shape = lru_cache(maxsize=SHAPE_CACHE_SIZE)(self._shape)
+
+    def _private_code(self, glyph: int, text: str) -> int:
+        with self._lock:
+            code = self.private_codes.get((glyph, text))
+            if code is None:
+                code = self._PRIVATE_USE_BASE + len(self.private_codes)
+                self.face.charToGlyph[code] = glyph
+                self.face.charWidths[code] = self.face.hmetrics[glyph][0] * 1000. / self.face.unitsPerEm
+                self.unicode_text[code] = text
+                self.private_codes[(glyph, text)] = code
+            return code
+
+    def _cluster_codes(self, glyphs: list, text: str) -> list:
+        """
+        Code points to draw a cluster's glyphs with.
+        """
+        if len(glyphs) == 1 and len(text) == 1 and self.face.charToGlyph.get(ord(text)) == glyphs[0]:
+            return [ord(text)]
+
+        # The first glyph takes the leading characters and each later glyph one more; glyphs
+        # beyond the cluster's characters map to a zero width space
+        lead = max(len(text) - len(glyphs) + 1, 1)
+        pieces = [text[:lead]] + list(text[lead:])
+        pieces += ['\u200b'] * (len(glyphs) - len(pieces))
+        return [self._private_code(glyph, piece) for glyph, piece in zip(glyphs, pieces)]
+
+    def _shape(self, text: str) -> tuple:
+        """
+        Shape text into (code point, x advance, x offset, y offset) per glyph, in font units.
+        """
+        buf = hb.Buffer()
+        buf.add_codepoints([ord(char) for char in text])  # clusters index characters of text
+        buf.guess_segment_properties()
+        hb.shape(self.hb_font, buf, {})
+
+        infos = buf.glyph_infos
+        positions = buf.glyph_positions
+        cluster_starts = sorted({info.cluster for info in infos})
+        cluster_ends = dict(zip(cluster_starts, cluster_starts[1:] + [len(text)]))
+
+        shaped = []
+        start = 0
+        while start < len(infos):
+            cluster = infos[start].cluster
+            end = start + 1
+            while end < len(infos) and infos[end].cluster == cluster:
+                end += 1
+            codes = self._cluster_codes([info.codepoint for info in infos[start:end]],
+                                        text[cluster:cluster_ends[cluster]])
+            shaped.extend(
+                (code, position.x_advance, position.x_offset, position.y_offset)
+                for code, position in zip(codes, positions[start:end])
+            )
+            start = end
+        return tuple(shaped)
+
+    def width(self, text: str, font_size: float) -> float:
+        return sum(glyph[1] for glyph in self.shape(text)) * font_size / self.units_per_em
+
+    def draw(self, c, text: str, x: float, y: float, font_size: float):
+        """
+        Draw shaped text with its baseline at (x, y). Glyphs that sit where the font's own advance
+        widths would put them are drawn as a single run; the rest are placed individually.
+        """
+        scale = font_size / self.units_per_em
+        char_widths = self.face.charWidths
+
+        runs = []
+        pen_x = x
+        run_end = None
+        for code, x_advance, x_offset, y_offset in self.shape(text):
+            if runs and run_end is not None and not x_offset and not y_offset and abs(run_end - pen_x) < 0.01:
+                runs[-1][2].append(chr(code))
+            else:
+                runs.append((pen_x + x_offset * scale, y + y_offset * scale, [chr(code)]))
+
+            if x_offset or y_offset:
+                run_end = None
+            else:
+                run_end = pen_x + char_widths.get(code, 0) * font_size / 1000.
+            pen_x += x_advance * scale
+
+        text_object = c.beginText()
+        text_object.setFont(self.font_name, font_size)
+        for run_x, run_y, chars in runs:
+            text_object.setTextOrigin(run_x, run_y)
+            text_object.textOut(''.join(chars))
+        c.drawText(text_object)
+
+@lru_cache(maxsize=TEXT_WIDTH_CACHE_SIZE)
+def _string_width(text: str, font_name: str, font_size: float) -> float:
+    return pdfmetrics.stringWidth(text, font_name, font_size)
+
+def _wrap_words(words: list, word_widths: list, space_width: float, max_width: float) -> list:
+    """
+    Greedily wrap words into lines no wider than max_width (a single long word gets a line of its own).
+    """
+    lines = []
+    current = []
+    current_width = 0.0
+    for word, word_width in zip(words, word_widths):
+        added_width = word_width + (space_width if current else 0.0)
+        if current and current_width + added_width > max_width:
+            lines.append(' '.join(current))
+            current = [word]
+            current_width = word_width
+        else:
+            current.append(word)
+            current_width += added_width
+    if current:
+        lines.append(' '.join(current))
+    return lines
+
+def _draw_text_lines(c, lines: list, page_width: float, page_height: float, target_lang: str,
+                     base_font_name: str, shaper=None):
+    """
+    Draw translated lines onto the current canvas page at their original positions,
+    wrapping each one within its column.
+    """
+    # Hindi text tends to be longer, English shorter (same adjustment as the WeasyPrint renderer)
+    size_scale = 0.95 if target_lang == "hi" else 1.05
+
+    for line_data in lines:
+        if not isinstance(line_data, TextLine) or not line_data.text.strip():
+            continue
+
+        line_text = line_data.text
+        # Normalize the text for better Devanagari rendering
+        if target_lang == "hi":
+            line_text = normalize_devanagari_text(line_text)
+
+        font_size = line_data.font_size * size_scale
+        if shaper:
+            measure = lambda text: shaper.width(text, font_size)
+        else:
+            measure = lambda text: _string_width(text, base_font_name, font_size)
+
+        # Available width to the column edge, or from x position to right margin
+        max_width = max(line_data.width or page_width - line_data.x - 50, 100)  # Minimum 100pt width
+
+        words = line_text.split()
+        wrapped_lines = _wrap_words(words, [measure(word) for word in words], measure(' '), max_width)
+
+        # PDFPlumber uses top-left origin, ReportLab uses bottom-left; place the first baseline
+        # one font size below the top of the line, with the same 1.2 line height as the HTML renderer
+        baseline = page_height - line_data.y - font_size
+        for wrapped_line in wrapped_lines:
+            if shaper:
+                shaper.draw(c, wrapped_line, line_data.x, baseline, font_size)
+            else:
+                c.setFont(base_font_name, font_size)
+                c.drawString(line_data.x, baseline, wrapped_line)
+            baseline -= font_size * 1.2
+
+def create_translated_pdf(pages_data: dict, output_path: str, target_lang: str = "en", progress_callback=None):
     """
     Create a new PDF with translated text placed at the same positions as the original.
     Preserves font sizes and positioning for accurate layout matching.
 
+    Lines are drawn straight onto a ReportLab canvas, which is much faster than HTML layout for
+    absolutely positioned lines. Text wraps within the line's column like the WeasyPrint renderer.
+    Fonts are registered once per process, word widths are cached, and Devanagari is shaped
+    with HarfBuzz when uharfbuzz is installed.
+
     Args:
         pages_data: Dictionary containing pages with translated text and positioning info
         output_path: Path where the output PDF will be saved
         target_lang: Target language code ('en' or 'hi')
+        progress_callback: Optional callable(pages_done, total_pages) called after each page
     """
     try:
         # Register font based on target language
-        base_font_name = "Helvetica"
-        if target_lang == "hi":
-            base_font_name = register_hindi_font()
+        base_font_name, shaper = _get_reportlab_font(target_lang)
 
         # Process each page separately to maintain structure
         pages = pages_data.get('pages', [])
@@ -277,113 +1304,228 @@ def create_translated_pdf(pages_data: dict, output_path: str, target_lang: str =
         if not pages:
             raise Exception("No pages data provided")
 
-        c = None
+        c = canvas.Canvas(output_path)
 
         # Process each page
         for page_idx, page_data in enumerate(pages):
             # Get page-specific dimensions
             page_width = page_data.get('width', 612)  # default letter width
             page_height = page_data.get('height', 792)  # default letter height
+            c.setPageSize((page_width, page_height))
 
-            # Create canvas on first page
-            if c is None:
-                c = canvas.Canvas(output_path, pagesize=(page_width, page_height))
-
-            # Get translated lines with position information
-            translated_lines = page_data.get('lines', [])
-
-            # Process each line with its positioning
-            for line_data in translated_lines:
-                # Get line properties
-                if isinstance(line_data, dict):
-                    line_text = line_data.get('text', '')
-                    x_pos = line_data.get('x', 50)
-                    y_pos = line_data.get('y', 100)
-                    font_size = line_data.get('font_size', 12)
-                else:
-                    # Fallback for string lines
-                    line_text = str(line_data)
-                    x_pos = 50
-                    y_pos = page_height - 100
-                    font_size = 12
-
-                if not line_text.strip():
-                    continue
+            _draw_text_lines(c, page_data.get('lines', []), page_width, page_height, target_lang, base_font_name, shaper)
 
-                # Normalize the text for better Devanagari rendering
-                if target_lang == "hi":
-                    line_text = normalize_devanagari_text(line_text)
-
-                # Convert y coordinate (PDFPlumber uses top-left origin, ReportLab uses bottom-left)
-                reportlab_y = page_height - y_pos
-
-                # Set font size for this line
-                try:
-                    c.setFont(base_font_name, font_size)
-                except:
-                    c.setFont(base_font_name, 12)
-
-                # Handle text that might be too long for the position
-                # Calculate available width from x position to right margin
-                available_width = page_width - x_pos - 50
-
-                if available_width > 0:
-                    # Try to fit text in available space
-                    text_width = c.stringWidth(line_text, base_font_name, font_size)
-
-                    if text_width > available_width:
-                        # Text is too long, need to wrap or truncate
-                        # For now, we'll try to fit as much as possible
-                        chars_per_width = len(line_text) / text_width
-                        estimated_chars = int(available_width * chars_per_width * 0.95)
-
-                        if estimated_chars > 0 and estimated_chars < len(line_text):
-                            # Try to break at word boundary
-                            words = line_text.split()
-                            fitted_text = ""
-                            for word in words:
-                                test_text = fitted_text + " " + word if fitted_text else word
-                                if c.stringWidth(test_text, base_font_name, font_size) <= available_width:
-                                    fitted_text = test_text
-                                else:
-                                    break
-                            line_text = fitted_text if fitted_text else line_text[:estimated_chars]
-
-                    # Draw the text at the original position
-                    try:
-                        c.drawString(x_pos, reportlab_y, line_text)
-                    except Exception as e:
-                        print(f"Warning: Could not render line at ({x_pos}, {reportlab_y}): {e}")
-                        # Try with default font as fallback
-                        try:
-                            c.setFont("Helvetica", font_size)
-                            c.drawString(x_pos, reportlab_y, line_text)
-                        except:
-                            pass
-
-            # Show page (except after the last page, handled by save())
-            if page_idx < len(pages) - 1:
-                c.showPage()
+            c.showPage()
+            if progress_callback:
+                progress_callback(page_idx + 1, len(pages))
 
         # Save the PDF
-        if c:
-            c.save()
-            print(f"Successfully created PDF: {output_path} with {len(pages)} pages")
-        else:
-            raise Exception("Failed to create PDF canvas")
+        c.save()
+        print(f"Successfully created PDF: {output_path} with {len(pages)} pages")
 
     except Exception as e:
         raise Exception(f"Error creating PDF: {str(e)}")
 
+# Canvas transforms (a, b, c, d) from display coordinates to unrotated page space, by /Rotate;
+# the translation part depends on the page size and is added in _overlay_transform
+_ROTATION_MATRICES = {0: (1, 0, 0, 1), 90: (0, 1, -1, 0), 180: (-1, 0, 0, -1), 270: (0, -1, 1, 0)}
+
+def _overlay_transform(rotation: int, left: float, bottom: float, width: float, height: float) -> tuple:
+    """
+    Canvas transform so overlay drawing can use the displayed (rotated) coordinates pdfplumber reports.
+    """
+    a, b, c, d = _ROTATION_MATRICES[rotation]
+    e = {0: 0, 90: width, 180: width, 270: 0}[rotation]
+    f = {0: 0, 90: 0, 180: height, 270: height}[rotation]
+    return a, b, c, d, left + e, bottom + f
+
+def create_overlay_layer(pages_data: dict, source_pdf_path: str, output_path: str, target_lang: str = "en") -> list:
+    """
+    Draw the overlays for translated pages into a PDF of their own: white boxes over the source
+    text regions with the translations stamped on top, one overlay page per page that has
+    translated lines. All overlays share one document so the font is embedded once.
+
+    Args:
+        pages_data: Dictionary containing pages with translated text and positioning info
+        source_pdf_path: The PDF the pages were extracted from
+        output_path: Path or binary file the overlay PDF is written to
+        target_lang: Target language code ('en' or 'hi')
+
+    Returns:
+        Numbers of the pages that got an overlay page, in overlay page order
+    """
+    base_font_name, shaper = _get_reportlab_font(target_lang)
+    reader = PyPDF2.PdfReader(source_pdf_path)
+
+    overlay_canvas = canvas.Canvas(output_path)
+    overlay_page_nums = []
+
+    for page_data in pages_data.get('pages', []):
+        lines = [line for line in page_data.get('lines', []) if isinstance(line, TextLine) and line.text.strip()]
+        if not lines:
+            continue
+
+        source_page = reader.pages[page_data['page_num'] - 1]
+        rotation = int(source_page.get('/Rotate', 0) or 0) % 360
+        mediabox = source_page.mediabox
+        page_width = float(page_data.get('width', 612))
+        page_height = float(page_data.get('height', 792))
+
+        overlay_canvas.setPageSize((float(mediabox.right), float(mediabox.top)))
+        overlay_canvas.transform(*_overlay_transform(
+            rotation, float(mediabox.left), float(mediabox.bottom), float(mediabox.width), float(mediabox.height)))
+
+        # Cover the source text
+        overlay_canvas.setFillColorRGB(1, 1, 1)
+        for line in lines:
+            if line.text_width and line.text_height:
+                overlay_canvas.rect(line.x - 1, page_height - line.y - line.text_height - 1,
+                                    line.text_width + 2, line.text_height + 2, stroke=0, fill=1)
+        overlay_canvas.setFillColorRGB(0, 0, 0)
+
+        _draw_text_lines(overlay_canvas, lines, page_width, page_height, target_lang, base_font_name, shaper)
+        overlay_canvas.showPage()
+        overlay_page_nums.append(page_data['page_num'])
+
+    overlay_canvas.save()
+    return overlay_page_nums
+
+def stamp_overlay_layers(source_pdf_path: str, page_nums: list, layers: list, output_path: str,
+                         progress_callback=None):
+    """
+    Write the given source pages to output_path with their overlays merged on top, through a
+    single writer so the source's shared resources (fonts, images) are written once.
+
+    Args:
+        source_pdf_path: The PDF the pages were extracted from
+        page_nums: Numbers of the source pages to output, in order
+        layers: (overlay PDF path or binary file, page numbers) pairs from create_overlay_layer
+        output_path: Path where the output PDF will be saved
+        progress_callback: Optional callable(pages_done, total_pages) called after each page
+    """
+    reader = PyPDF2.PdfReader(source_pdf_path)
+
+    overlays = {}
+    for layer, layer_page_nums in layers:
+        if layer_page_nums:
+            layer_reader = PyPDF2.PdfReader(layer)
+            for overlay_idx, page_num in enumerate(layer_page_nums):
+                overlays[page_num] = layer_reader.pages[overlay_idx]
+
+    writer = PyPDF2.PdfWriter()
+    for page_idx, page_num in enumerate(page_nums):
+        source_page = reader.pages[page_num - 1]
+        if page_num in overlays:
+            source_page.merge_page(overlays[page_num])
+        writer.add_page(source_page)
+
+        if progress_callback:
+            progress_callback(page_idx + 1, len(page_nums))
+
+    with open(output_path, "wb") as output_file:
+        writer.write(output_file)
+    writer.close()
+
+    print(f"Successfully created overlay PDF: {output_path} with {len(page_nums)} pages, {len(overlays)} translated")
+
+def create_overlay_pdf(pages_data: dict, source_pdf_path: str, output_path: str, target_lang: str = "en",
+                       progress_callback=None):
+    """
+    Write translated text onto the original PDF pages instead of rebuilding them, keeping their
+    images, vector graphics and tables. The source text regions are covered with white boxes and
+    the translations are stamped on top. Pages with nothing to translate are copied untouched.
+    The covered source text stays in the page content underneath.
+
+    Args:
+        pages_data: Dictionary containing pages with translated text and positioning info
+        source_pdf_path: The PDF the pages were extracted from
+        output_path: Path where the output PDF will be saved
+        target_lang: Target language code ('en' or 'hi')
+        progress_callback: Optional callable(pages_done, total_pages) called after each page
+    """
+    try:
+        pages = pages_data.get('pages', [])
+        if not pages:
+            raise Exception("No pages data provided")
+
+        overlay_buffer = io.BytesIO()
+        overlay_page_nums = create_overlay_layer(pages_data, source_pdf_path, overlay_buffer, target_lang=target_lang)
+        stamp_overlay_layers(source_pdf_path, [page_data['page_num'] for page_data in pages],
+                             [(overlay_buffer, overlay_page_nums)], output_path, progress_callback=progress_callback)
+
+    except Exception as e:
+        raise Exception(f"Error creating overlay PDF: {str(e)}")
+
+def _utf16_hex(text: str) -> str:
+    return text.encode('utf-16-be').hex().upper()
+
+def _to_unicode_cmap(font_name: str, subset: list, unicode_text: dict) -> str:
+    """
+    Build a ToUnicode CMap for a font subset, mapping each code in the subset to the UTF-16BE
+    text it stands for (code points outside the BMP become surrogate pairs).
+    """
+    entries = ["<%02X> <%s>" % (i, _utf16_hex(unicode_text.get(code, chr(code)))) for i, code in enumerate(subset)]
+    cmap = [
+        "/CIDInit /ProcSet findresource begin",
+        "12 dict begin",
+        "begincmap",
+        "/CIDSystemInfo",
+        "<< /Registry (%s)" % font_name,
+        "/Ordering (%s)" % font_name,
+        "/Supplement 0",
+        ">> def",
+        "/CMapName /%s def" % font_name,
+        "/CMapType 2 def",
+        "1 begincodespacerange",
+        "<00> <%02X>" % (len(subset) - 1),
+        "endcodespacerange",
+    ]
+    # A bfchar block holds at most 100 entries
+    for start in range(0, len(entries), 100):
+        block = entries[start:start + 100]
+        cmap += ["%d beginbfchar" % len(block)] + block + ["endbfchar"]
+    cmap += [
+        "endcmap",
+        "CMapName currentdict /CMap defineresource pop",
+        "end",
+        "end"
+    ]
+    return '\n'.join(cmap)
+
+class _ShapedTTFont(TTFont):
+    """
+    TrueType font whose ToUnicode CMaps map the private use code points given to shaped glyphs
+    back to the text they were shaped from, so the drawn text can still be extracted and searched.
+    """
+
+    def __init__(self, name: str, filename: str):
+        super().__init__(name, filename)
+        self.unicode_text = {}  # private use code point -> text it stands for
+
+    def addObjects(self, doc):
+        state = self.state.get(doc)
+        subsets = [list(subset) for subset in state.subsets] if state is not None else []
+        super().addObjects(doc)
+
+        for n, subset in enumerate(subsets):
+            base_font_name = b''.join((SUBSETN(n), b'+', self.face.name, self.face.subfontNameX)).decode('pdfdoc')
+            cmap_stream = doc.idToObject.get('toUnicodeCMap:' + base_font_name)
+            if cmap_stream is not None:
+                cmap_stream.content = _to_unicode_cmap(base_font_name, subset, self.unicode_text)
+
 def register_hindi_font():
     """
     Register a Hindi font for use in PDFs.
     This function registers the Noto Sans Devanagari font for proper Hindi text rendering.
+    The font is only read and registered on the first call in a process.
     """
-    font_path = "fonts/NotoSansDevanagari-Regular.ttf"
+    if 'HindiFont' in pdfmetrics.getRegisteredFontNames():
+        return 'HindiFont'
+
+    font_path = HINDI_FONT_PATH
     if os.path.exists(font_path):
         try:
-            pdfmetrics.registerFont(TTFont('HindiFont', font_path))
+            pdfmetrics.registerFont(_ShapedTTFont('HindiFont', font_path))
             return 'HindiFont'
         except Exception as e:
             print(f"Error registering Hindi font: {e}")
@@ -392,132 +1534,229 @@ def register_hindi_font():
         print(f"Hindi font not found at {font_path}")
         return 'Helvetica'
 
-def create_translated_pdf_weasyprint(pages_data: dict, output_path: str, target_lang: str = "en"):
+_WEASYPRINT_BASE_CSS = """
+@page { margin: 0; }
+body { margin: 0; padding: 0; font-family: %s; }
+.page { position: relative; page-break-after: always; overflow: hidden; }
+.l {
+    position: absolute;
+    word-wrap: break-word;
+    overflow-wrap: break-word;
+    hyphens: auto;
+    line-height: 1.2;
+    text-rendering: optimizeLegibility;
+    -webkit-font-smoothing: antialiased;
+}
+"""
+
+_weasyprint_styles = threading.local()
+
+def _get_weasyprint_stylesheet(target_lang: str) -> tuple:
+    """
+    Return the shared (stylesheet, font configuration) for a target language.
+    They are parsed once per rendering thread and reused for every document and batch,
+    so the @font-face font is loaded once rather than on each render.
+    """
+    cache = getattr(_weasyprint_styles, 'cache', None)
+    if cache is None:
+        cache = _weasyprint_styles.cache = {}
+
+    if target_lang not in cache:
+        # Set font based on language
+        font_family = "'Noto Sans Devanagari', sans-serif" if target_lang == "hi" else "Arial, sans-serif"
+        css_content = _WEASYPRINT_BASE_CSS % font_family
+
+        # Embed the Devanagari font for Hindi output
+        font_path = os.path.abspath(HINDI_FONT_PATH)
+        if target_lang == "hi" and os.path.exists(font_path):
+            css_content = f"""
+            @font-face {{
+                font-family: 'Noto Sans Devanagari';
+                src: url('file://{font_path}') format('truetype');
+                font-display: swap;
+            }}
+            """ + css_content
+
+        font_config = FontConfiguration()
+        cache[target_lang] = (CSS(string=css_content, font_config=font_config), font_config)
+
+    return cache[target_lang]
+
+def _build_weasyprint_html(pages: list, target_lang: str) -> str:
+    """
+    Build compact HTML for a list of pages: one absolutely positioned div per line, with
+    font sizes (rounded to half a point) shared through generated CSS classes.
+    """
+    # Hindi text tends to be longer, English shorter
+    size_scale = 0.95 if target_lang == "hi" else 1.05
+
+    size_classes = {}
+    body = []
+    for page_data in pages:
+        page_width = page_data.get('width', 612)
+        page_height = page_data.get('height', 792)
+        body.append(f'<div class="page" style="width:{page_width:.1f}pt;height:{page_height:.1f}pt">')
+
+        for line_data in page_data.get('lines', []):
+            if not isinstance(line_data, TextLine) or not line_data.text.strip():
+                continue
+
+            # Available width: to the edge of the line's column, or to the right edge with margin
+            max_width = max(line_data.width or page_width - line_data.x - 50, 100)  # Minimum 100pt width
+
+            font_size = round(line_data.font_size * size_scale * 2) / 2
+            size_class = size_classes.setdefault(font_size, f"f{len(size_classes)}")
+
+            body.append(
+                f'<div class="l {size_class}" style="left:{line_data.x:.1f}pt;top:{line_data.y:.1f}pt;'
+                f'max-width:{max_width:.1f}pt">{html_module.escape(line_data.text)}</div>'
+            )
+
+        body.append('</div>')
+
+    size_css = ''.join(f'.{size_class}{{font-size:{font_size:g}pt}}' for font_size, size_class in size_classes.items())
+    return ''.join([
+        '<!DOCTYPE html><html><head><meta charset="UTF-8"><style>', size_css, '</style></head><body>',
+        *body,
+        '</body></html>'
+    ])
+
+def merge_pdf_files(part_paths: list, output_path: str):
+    """
+    Concatenate PDF files into output_path in order.
+    """
+    if len(part_paths) == 1:
+        shutil.move(part_paths[0], output_path)
+        return
+
+    writer = PyPDF2.PdfWriter()
+    for part_path in part_paths:
+        writer.append(part_path)
+    with open(output_path, "wb") as output_file:
+        writer.write(output_file)
+    writer.close()
+
+def _write_weasyprint_pdf(pages: list, output_path: str, target_lang: str, progress_callback=None):
+    """
+    Lay out and write pages with WeasyPrint in this process, RENDER_BATCH_PAGES at a time if set.
+    """
+    stylesheet, font_config = _get_weasyprint_stylesheet(target_lang)
+
+    def write_pages(batch: list, path: str):
+        HTML(string=_build_weasyprint_html(batch, target_lang)).write_pdf(
+            path,
+            stylesheets=[stylesheet],
+            font_config=font_config,
+            presentational_hints=True
+        )
+
+    batch_size = RENDER_BATCH_PAGES if RENDER_BATCH_PAGES > 0 else len(pages)
+    if batch_size >= len(pages):
+        write_pages(pages, output_path)
+        if progress_callback:
+            progress_callback(len(pages), len(pages))
+        return
+
+    parts_dir = tempfile.mkdtemp(prefix="render_", dir=os.path.dirname(os.path.abspath(output_path)))
+    try:
+        part_paths = []
+        for start in range(0, len(pages), batch_size):
+            part_path = os.path.join(parts_dir, f"part_{len(part_paths):05d}.pdf")
+            write_pages(pages[start:start + batch_size], part_path)
+            part_paths.append(part_path)
+            if progress_callback:
+                progress_callback(min(start + batch_size, len(pages)), len(pages))
+        merge_pdf_files(part_paths, output_path)
+    finally:
+        shutil.rmtree(parts_dir, ignore_errors=True)
+
+_render_pool = None
+_render_pool_lock = threading.Lock()
+
+def _get_render_pool() -> ProcessPoolExecutor:
+    """
+    Return the shared page rendering process pool, creating it on first use.
+    """
+    global _render_pool
+    with _render_pool_lock:
+        if _render_pool is None:
+            _render_pool = ProcessPoolExecutor(max_workers=_render_process_count())
+        return _render_pool
+
+def _render_process_count() -> int:
+    return RENDER_PROCESSES if RENDER_PROCESSES > 0 else (os.cpu_count() or 1)
+
+def render_process_count() -> int:
+    """
+    Processes available for rendering independent parts at the same time.
+    """
+    return _render_process_count()
+
+def submit_render_part(fn, *args, **kwargs):
+    """
+    Run a render function on the rendering process pool, so independent parts of a document
+    (such as streamed batches) render on separate cores.
+    """
+    return _get_render_pool().submit(fn, *args, **kwargs)
+
+def _render_pages_parallel(pages: list, output_path: str, target_lang: str, progress_callback=None):
+    """
+    Render contiguous page ranges in the rendering process pool and merge the parts in page order.
+    Each process gets a single range, so the font is embedded once per process rather than per page.
+    """
+    workers = _render_process_count()
+    range_size = -(-len(pages) // workers)
+    ranges = [(start, min(start + range_size, len(pages))) for start in range(0, len(pages), range_size)]
+
+    print(f"Rendering {len(pages)} pages in {len(ranges)} ranges across {workers} processes")
+
+    parts_dir = tempfile.mkdtemp(prefix="render_", dir=os.path.dirname(os.path.abspath(output_path)))
+    try:
+        pool = _get_render_pool()
+        part_paths = [os.path.join(parts_dir, f"part_{i:05d}.pdf") for i in range(len(ranges))]
+        futures = [
+            pool.submit(_write_weasyprint_pdf, pages[start:end], part_path, target_lang)
+            for (start, end), part_path in zip(ranges, part_paths)
+        ]
+
+        for future, (start, end) in zip(futures, ranges):
+            future.result()
+            if progress_callback:
+                progress_callback(end, len(pages))
+
+        merge_pdf_files(part_paths, output_path)
+    finally:
+        shutil.rmtree(parts_dir, ignore_errors=True)
+
+def create_translated_pdf_weasyprint(pages_data: dict, output_path: str, target_lang: str = "en", progress_callback=None,
+                                     parallel: bool = None):
     """
     Create a PDF using weasyprint for better Devanagari/Hindi text rendering.
     Uses HTML/CSS for layout with smart text sizing and wrapping for perfect layout preservation.
 
+    With RENDER_BATCH_PAGES set, pages are laid out that many at a time into temporary parts
+    that are merged at the end, so peak memory is bounded by the batch instead of the document.
+
     Args:
         pages_data: Dictionary containing pages with translated text and positioning info
         output_path: Path where the output PDF will be saved
         target_lang: Target language code ('en' or 'hi')
+        progress_callback: Optional callable(pages_done, total_pages) called when pages are written
+        parallel: Render page ranges across a process pool and merge them. Defaults to doing so for
+            documents with at least PARALLEL_RENDER_MIN_PAGES pages when more than one process is available.
     """
     try:
         pages = pages_data.get('pages', [])
         if not pages:
             raise Exception("No pages data provided")
 
-        # Set font based on language
-        font_family = "'Noto Sans Devanagari', sans-serif" if target_lang == "hi" else "Arial, sans-serif"
-        font_path = os.path.abspath("fonts/NotoSansDevanagari-Regular.ttf") if target_lang == "hi" else None
-
-        # Build HTML content with improved layout handling
-        html_content = f"""
-        <!DOCTYPE html>
-        <html>
-        <head>
-            <meta charset="UTF-8">
-            <style>
-                @page {{
-                    margin: 0;
-                }}
-                body {{
-                    margin: 0;
-                    padding: 0;
-                    font-family: {font_family};
-                }}
-                .page {{
-                    position: relative;
-                    page-break-after: always;
-                    overflow: hidden;
-                }}
-                .line {{
-                    position: absolute;
-                    word-wrap: break-word;
-                    overflow-wrap: break-word;
-                    hyphens: auto;
-                    line-height: 1.2;
-                    text-rendering: optimizeLegibility;
-                    -webkit-font-smoothing: antialiased;
-                }}
-            </style>
-        </head>
-        <body>
-        """
+        if parallel is None:
+            parallel = _render_process_count() > 1 and len(pages) >= PARALLEL_RENDER_MIN_PAGES
 
-        # Add each page
-        for page_idx, page_data in enumerate(pages):
-            page_width = page_data.get('width', 612)
-            page_height = page_data.get('height', 792)
-            lines = page_data.get('lines', [])
-
-            html_content += f"""
-            <div class="page" style="width: {page_width}pt; height: {page_height}pt;">
-            """
-
-            # Add each line with smart width calculation
-            for line_data in lines:
-                if isinstance(line_data, dict):
-                    line_text = html_module.escape(line_data.get('text', ''))
-                    x_pos = line_data.get('x', 50)
-                    y_pos = line_data.get('y', 100)
-                    font_size = line_data.get('font_size', 12)
-
-                    # Calculate available width (from x position to right edge with margin)
-                    available_width = page_width - x_pos - 50
-                    max_width = max(available_width, 100)  # Minimum 100pt width
-                else:
-                    continue
-
-                if not line_text.strip():
-                    continue
-
-                # Smart font size adjustment for better fit
-                # Hindi text tends to be longer, English shorter
-                adjusted_font_size = font_size
-                if target_lang == "hi":
-                    # Slightly smaller font for Hindi to accommodate longer text
-                    adjusted_font_size = font_size * 0.95
-                else:
-                    # Slightly larger font for English as it's often shorter
-                    adjusted_font_size = font_size * 1.05
-
-                html_content += f"""
-                <div class="line" style="left: {x_pos}pt; top: {y_pos}pt; font-size: {adjusted_font_size}pt; max-width: {max_width}pt;">
-                    {line_text}
-                </div>
-                """
-
-            html_content += "</div>\n"
-
-        html_content += """
-        </body>
-        </html>
-        """
-
-        # Create CSS for font embedding with better rendering
-        css_content = ""
-        if target_lang == "hi" and font_path and os.path.exists(font_path):
-            css_content = f"""
-            @font-face {{
-                font-family: 'Noto Sans Devanagari';
-                src: url('file://{font_path}') format('truetype');
-                font-display: swap;
-            }}
-            """
-
-        # Generate PDF using weasyprint with optimized settings
-        if css_content:
-            HTML(string=html_content).write_pdf(
-                output_path,
-                stylesheets=[CSS(string=css_content)],
-                presentational_hints=True
-            )
+        if parallel:
+            _render_pages_parallel(pages, output_path, target_lang, progress_callback)
         else:
-            HTML(string=html_content).write_pdf(
-                output_path,
-                presentational_hints=True
-            )
+            _write_weasyprint_pdf(pages, output_path, target_lang, progress_callback)
 
         print(f"Successfully created PDF with weasyprint: {output_path} with {len(pages)} pages")
 
@@ -0,0 +1,435 @@
+import os
+import queue
+from collections import deque
+import shutil
+import tempfile
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from layout import TextLine
+from pdf_processor import (
+    extract_text_from_pdf, iter_pdf_pages, merge_pdf_files, create_overlay_layer, create_overlay_pdf,
+    create_translated_pdf, create_translated_pdf_weasyprint, extraction_version, render_process_count,
+    stamp_overlay_layers,
+    submit_render_part
+)
+from providers import get_provider_signature
+from translator import translate_segments
+
+# Stage pool sizes
+EXTRACT_WORKERS = int(os.getenv("EXTRACT_WORKERS", "2"))
+TRANSLATE_WORKERS = int(os.getenv("TRANSLATE_WORKERS", "4"))
+RENDER_WORKERS = int(os.getenv("RENDER_WORKERS", "2"))
+STREAM_WORKERS = int(os.getenv("STREAM_WORKERS", "4"))  # documents streamed concurrently
+
+# "thread" runs CPU-bound stages (extraction, rendering) in thread pools,
+# "process" runs them in worker processes so they don't compete for the GIL
+PIPELINE_EXECUTOR = os.getenv("PIPELINE_EXECUTOR", "thread").lower()
+
+# "weasyprint" lays pages out as HTML/CSS, "reportlab" draws lines straight onto a PDF canvas,
+# "overlay" writes the translations onto the original pages, keeping images and graphics
+RENDER_ENGINE = os.getenv("RENDER_ENGINE", "weasyprint").lower()
+
+# Part of the result cache key: bump when extraction or rendering changes the output PDFs
+RENDERER_VERSION = "2"
+
+# Streaming runs extraction, translation and rendering page by page with the stages overlapping.
+# At most STREAM_PAGE_WINDOW pages wait between two stages. Translated pages are rendered in one
+# pass once the last page is translated, or with STREAM_RENDER_BATCH set, that many at a time into
+# parts merged at the end; each part embeds its own font subset, so the output grows with the
+# number of parts.
+PIPELINE_STREAMING = os.getenv("PIPELINE_STREAMING", "true").lower() == "true"
+STREAM_PAGE_WINDOW = int(os.getenv("STREAM_PAGE_WINDOW", "4"))
+STREAM_RENDER_BATCH = int(os.getenv("STREAM_RENDER_BATCH", "0"))
+
+
+class PipelineInputError(Exception):
+    """
+    Raised when the uploaded PDF has no content that can be translated.
+    """
+
+
+_executors = {}
+_executors_lock = threading.Lock()
+
+
+def _get_stage_executor(stage: str):
+    """
+    Return the executor for a pipeline stage, creating it on first use.
+    Translation is I/O-bound and always uses threads, as does the streaming coordinator.
+    """
+    with _executors_lock:
+        if stage not in _executors:
+            if stage == "extract":
+                workers = EXTRACT_WORKERS
+            elif stage == "render":
+                workers = RENDER_WORKERS
+            elif stage == "stream":
+                workers = STREAM_WORKERS
+            else:
+                workers = TRANSLATE_WORKERS
+            workers = max(1, workers)
+
+            if stage_runs_in_process(stage):
+                _executors[stage] = ProcessPoolExecutor(max_workers=workers)
+            else:
+                _executors[stage] = ThreadPoolExecutor(max_workers=workers, thread_name_prefix=stage)
+        return _executors[stage]
+
+
+def submit_stage(stage: str, fn, *args, **kwargs) -> Future:
+    """
+    Run a pipeline stage function on its stage executor.
+    """
+    return _get_stage_executor(stage).submit(fn, *args, **kwargs)
+
+
+def stage_runs_in_process(stage: str) -> bool:
+    """
+    Whether a stage runs in a worker process (callbacks cannot cross the process boundary).
+    """
+    return PIPELINE_EXECUTOR == "process" and stage in ("extract", "render")
+
+
+def shutdown_executors():
+    with _executors_lock:
+        for executor in _executors.values():
+            executor.shutdown(wait=False, cancel_futures=True)
+        _executors.clear()
+
+
+def extract_pages(input_pdf_path: str, progress_callback=None) -> dict:
+    """
+    Extraction stage: read text and layout from the uploaded PDF.
+    """
+    print(f"Extracting text from PDF: {input_pdf_path}")
+    pages_data = extract_text_from_pdf(input_pdf_path, progress_callback=progress_callback)
+
+    if not pages_data.get('pages'):
+        raise PipelineInputError("Could not extract text from PDF. The PDF might be empty, encrypted, or corrupted.")
+
+    return pages_data
+
+
+def translate_pages(pages_data: dict, source_lang: str, target_lang: str, progress_callback=None) -> dict:
+    """
+    Translation stage: translate every line as its own segment and put each translation
+    back on the line it came from. 'failed_segments' counts the lines left untranslated
+    because every provider failed on them, 'ocr_failed_pages' the pages that needed OCR
+    but could not get it.
+    """
+    pages = pages_data['pages']
+    segments = [_line_text(line) for page in pages for line in page['lines']]
+
+    if not any(segment.strip() for segment in segments):
+        raise PipelineInputError("No text content found in PDF. The PDF may contain only images without embedded text. Please ensure the PDF contains extractable text.")
+
+    print(f"Extracted {len(segments)} lines, {sum(len(segment) for segment in segments)} characters")
+
+    print(f"Translating from {source_lang} to {target_lang}")
+    # Create new pages data structure
+    translated_pages, failed_segments = _translate_page_group(pages, source_lang, target_lang, progress_callback)
+    return {
+        'pages': translated_pages,
+        'failed_segments': failed_segments,
+        'ocr_failed_pages': _count_ocr_failed(pages)
+    }
+
+
+def _translate_page_group(pages: list, source_lang: str, target_lang: str, progress_callback=None) -> tuple:
+    """
+    Translate the lines of several pages in one go so they share provider requests.
+
+    Returns:
+        (translated pages, number of lines that could not be translated)
+    """
+    segments = [_line_text(line) for page in pages for line in page['lines']]
+    translated_segments, failed_segments = translate_segments(segments, source_lang=source_lang,
+                                                              target_lang=target_lang,
+                                                              progress_callback=progress_callback)
+
+    translated_pages = []
+    position = 0
+    for page in pages:
+        line_count = len(page['lines'])
+        translated_pages.append(_apply_line_translations(page, translated_segments[position:position + line_count]))
+        position += line_count
+    return translated_pages, failed_segments
+
+
+def _count_ocr_failed(pages: list) -> int:
+    return sum(1 for page in pages if page.get('ocr_failed'))
+
+
+def _line_text(line) -> str:
+    return line.text if isinstance(line, TextLine) else str(line)
+
+
+def _apply_line_translations(page: dict, translated_lines: list) -> dict:
+    """
+    Build the translated page: each line keeps its position and font size with its own translation.
+    """
+    if not page['lines']:
+        return page
+
+    lines = []
+    for original_line, translated_text in zip(page['lines'], translated_lines):
+        if isinstance(original_line, TextLine):
+            lines.append(TextLine(translated_text.strip(), original_line.x, original_line.y, original_line.font_size,
+                                  width=original_line.width, text_width=original_line.text_width,
+                                  text_height=original_line.text_height))
+        else:
+            # Fallback for plain string lines
+            lines.append(TextLine(translated_text.strip()))
+
+    return {
+        'page_num': page['page_num'],
+        'text': '\n'.join(line.text for line in lines),
+        'lines': lines,
+        'width': page['width'],
+        'height': page['height']
+    }
+
+
+def renderer_version() -> str:
+    """
+    Identify the renderer output, so cached results from another engine or version are not reused.
+    """
+    return f"{RENDER_ENGINE}-{RENDERER_VERSION}"
+
+
+def result_signature() -> str:
+    """
+    Identify everything besides the document and language pair that shapes a translated PDF:
+    the renderer, the extraction and OCR settings and the translation providers.
+    """
+    return f"{renderer_version()}|{extraction_version()}|{get_provider_signature()}"
+
+
+def render_pages(translated_pages_data: dict, output_pdf_path: str, target_lang: str, progress_callback=None,
+                 source_pdf_path: str = None):
+    """
+    Rendering stage: write the translated pages to a new PDF.
+    The overlay engine needs the source PDF the pages were extracted from.
+    """
+    print(f"Creating translated PDF: {output_pdf_path}")
+    if RENDER_ENGINE == "overlay":
+        if not source_pdf_path:
+            raise ValueError("The overlay render engine needs the source PDF")
+        create_overlay_pdf(translated_pages_data, source_pdf_path, output_pdf_path, target_lang=target_lang,
+                           progress_callback=progress_callback)
+    elif RENDER_ENGINE == "reportlab":
+        create_translated_pdf(translated_pages_data, output_pdf_path, target_lang=target_lang,
+                              progress_callback=progress_callback)
+    else:
+        create_translated_pdf_weasyprint(translated_pages_data, output_pdf_path, target_lang=target_lang,
+                                         progress_callback=progress_callback)
+    return output_pdf_path
+
+
+_STREAM_END = object()
+
+
+def stream_pages(input_pdf_path: str, output_pdf_path: str, source_lang: str, target_lang: str,
+                 progress_callback=None):
+    """
+    Streaming pipeline: page N renders while page N+1 translates and page N+2 is extracted.
+
+    Extraction and translation run on their own threads and hand pages on through queues of
+    STREAM_PAGE_WINDOW pages, so a slow stage holds back the ones before it and memory is bounded
+    by the pages in flight rather than by the document size. Translated pages are rendered in
+    one pass at the end, or with STREAM_RENDER_BATCH set, in batches of that many pages, one batch
+    per rendering process at a time, with the parts merged into the output PDF in page order. With the overlay engine the batches only draw the
+    overlays, which are stamped onto the source pages through one writer at the end.
+
+    Rendering starts only once a page with text has come through, so a document without any
+    text is refused before anything is rendered.
+
+    Args:
+        progress_callback: Optional callable(**progress) with pages_extracted, total_pages,
+            pages_translated, chunks_translated, total_chunks and pages_rendered counts
+
+    Returns:
+        Dictionary with 'failed_segments', the lines that kept their source text because every
+        provider failed on them, and 'ocr_failed_pages', the pages that needed OCR but could not get it
+    """
+    def report(**progress):
+        if progress_callback:
+            progress_callback(**progress)
+
+    window = max(1, STREAM_PAGE_WINDOW)
+    extracted = queue.Queue(maxsize=window)
+    translated = queue.Queue(maxsize=window)
+    stop = threading.Event()
+    errors = []
+    summary = {'failed_segments': 0, 'ocr_failed_pages': 0}
+
+    def extract_worker():
+        try:
+            for page in iter_pdf_pages(input_pdf_path, progress_callback=lambda done, total: report(
+                    pages_extracted=done, total_pages=total)):
+                if not _put_page(extracted, page, stop):
+                    return
+        except Exception as e:
+            errors.append(e)
+            stop.set()
+        finally:
+            _put_page(extracted, _STREAM_END, stop)
+
+    def translate_worker():
+        pages_translated = 0
+        # Segment progress of the page groups translated so far, and of the current group
+        chunks = {'done': 0, 'total': 0, 'group_total': 0}
+        finished = False
+
+        def report_chunks(done: int, total: int):
+            chunks['group_total'] = total
+            report(chunks_translated=chunks['done'] + done, total_chunks=chunks['total'] + total)
+        try:
+            while not finished:
+                # Translate whatever pages are already waiting together, to fill provider batches
+                pages = [_get_page(extracted, stop)]
+                while pages[-1] is not _STREAM_END and len(pages) < window:
+                    try:
+                        pages.append(extracted.get_nowait())
+                    except queue.Empty:
+                        break
+                if pages[-1] is _STREAM_END:
+                    pages.pop()
+                    finished = True
+
+                summary['ocr_failed_pages'] += _count_ocr_failed(pages)
+                if any(_line_text(line).strip() for page in pages for line in page['lines']):
+                    chunks['group_total'] = 0
+                    pages, failed = _translate_page_group(pages, source_lang, target_lang, report_chunks)
+                    summary['failed_segments'] += failed
+                    chunks['done'] += chunks['group_total']
+                    chunks['total'] += chunks['group_total']
+
+                for page in pages:
+                    if not _put_page(translated, page, stop):
+                        return
+                pages_translated += len(pages)
+                report(pages_translated=pages_translated)
+        except Exception as e:
+            errors.append(e)
+            stop.set()
+        finally:
+            _put_page(translated, _STREAM_END, stop)
+
+    print(f"Streaming {input_pdf_path} from {source_lang} to {target_lang}")
+    threads = [
+        threading.Thread(target=extract_worker, name="stream-extract", daemon=True),
+        threading.Thread(target=translate_worker, name="stream-translate", daemon=True),
+    ]
+    for thread in threads:
+        thread.start()
+
+    parts_dir = tempfile.mkdtemp(prefix="parts_", dir=os.path.dirname(os.path.abspath(output_pdf_path)))
+    part_paths = []
+    part_results = {}  # part path -> render result (the overlay page numbers for overlay parts)
+    page_nums = []
+    batch = []
+    rendering = deque()  # (future, part path, page count) of parts in flight, oldest first
+    pages_rendered = 0
+    has_text = False
+
+    # Batches render on separate cores when rendering processes are available,
+    # with up to one batch per process in flight
+    render_slots = render_process_count()
+
+    def submit_part(batch: list, part_path: str):
+        if RENDER_ENGINE == "overlay":
+            args = (create_overlay_layer, {'pages': batch}, input_pdf_path, part_path, target_lang)
+        else:
+            args = (render_pages, {'pages': batch}, part_path, target_lang)
+        if render_slots > 1:
+            return submit_render_part(*args)
+        return submit_stage("render", *args)
+
+    def finish_part():
+        nonlocal pages_rendered
+        future, part_path, page_count = rendering.popleft()
+        part_results[part_path] = future.result()
+        pages_rendered += page_count
+        report(pages_rendered=pages_rendered)
+
+    try:
+        while True:
+            page = _get_page(translated, stop)
+            if page is _STREAM_END and errors:
+                break
+            if page is not _STREAM_END:
+                has_text = has_text or any(_line_text(line).strip() for line in page['lines'])
+                batch.append(page)
+                page_nums.append(page['page_num'])
+
+            if batch and has_text and (page is _STREAM_END or 0 < STREAM_RENDER_BATCH <= len(batch)):
+                part_path = os.path.join(parts_dir, f"part_{len(part_paths):05d}.pdf")
+                rendering.append((submit_part(batch, part_path), part_path, len(batch)))
+                part_paths.append(part_path)
+                batch = []
+                while len(rendering) >= render_slots:
+                    finish_part()
+
+            if page is _STREAM_END:
+                break
+
+        while rendering and not errors:
+            finish_part()
+    except Exception as e:
+        errors.append(e)
+    finally:
+        stop.set()
+        for thread in threads:
+            thread.join()
+        # Let parts still rendering finish before their directory is removed
+        for future, _, _ in rendering:
+            future.cancel()
+            try:
+                future.result()
+            except Exception:
+                pass
+
+    try:
+        if errors:
+            raise errors[0]
+        if not page_nums:
+            raise PipelineInputError("Could not extract text from PDF. The PDF might be empty, encrypted, or corrupted.")
+        if not has_text:
+            raise PipelineInputError("No text content found in PDF. The PDF may contain only images without embedded text. Please ensure the PDF contains extractable text.")
+
+        if RENDER_ENGINE == "overlay":
+            stamp_overlay_layers(input_pdf_path, page_nums,
+                                 [(part_path, part_results[part_path]) for part_path in part_paths], output_pdf_path)
+        else:
+            merge_pdf_files(part_paths, output_pdf_path)
+        print(f"Streamed {pages_rendered} pages to {output_pdf_path}")
+        return summary
+    finally:
+        shutil.rmtree(parts_dir, ignore_errors=True)
+
+
+def _put_page(page_queue: queue.Queue, page, stop: threading.Event) -> bool:
+    """
+    Block until the next stage has room for the page; give up if the pipeline is stopping.
+    """
+    while True:
+        try:
+            page_queue.put(page, timeout=0.1)
+            return True
+        except queue.Full:
+            if stop.is_set():
+                return False
+
+
+def _get_page(page_queue: queue.Queue, stop: threading.Event):
+    """
+    Wait for the next page from the previous stage; end the stream if the pipeline is stopping.
+    """
+    while True:
+        try:
+            return page_queue.get(timeout=0.1)
+        except queue.Empty:
+            if stop.is_set():
+                return _STREAM_END
+
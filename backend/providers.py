@@ -0,0 +1,457 @@
+from bs4 import BeautifulSoup
+from collections import deque
+from contextlib import contextmanager
+from typing import Optional
+import json
+import os
+import threading
+import time
+from http_session import get_session, get_timeout
+
+# Providers tried for each segment, in order
+TRANSLATION_PROVIDERS = [
+    name.strip() for name in os.getenv("TRANSLATION_PROVIDERS", "mymemory,google").split(",") if name.strip()
+]
+
+# Local/offline provider: a LibreTranslate-compatible server on localhost, or, when no URL is
+# set, an in-process stand-in that applies an optional JSON dictionary and echoes everything else
+LOCAL_TRANSLATOR_URL = os.getenv("LOCAL_TRANSLATOR_URL", "")
+LOCAL_TRANSLATOR_DICTIONARY = os.getenv("LOCAL_TRANSLATOR_DICTIONARY", "")
+LOCAL_TRANSLATOR_DELAY_MS = float(os.getenv("LOCAL_TRANSLATOR_DELAY_MS", "0"))  # simulated latency for load tests
+
+
+# Routing: "latency" sends each batch to the fastest healthy provider first,
+# "priority" keeps the TRANSLATION_PROVIDERS order and only skips open circuits
+TRANSLATION_ROUTING = os.getenv("TRANSLATION_ROUTING", "latency").lower()
+
+# Circuit breaker: open after this many consecutive failures, or when the error rate over the
+# rolling window exceeds the threshold; retry one trial request after the cooldown
+CIRCUIT_FAILURE_THRESHOLD = int(os.getenv("CIRCUIT_FAILURE_THRESHOLD", "3"))
+CIRCUIT_ERROR_RATE = float(os.getenv("CIRCUIT_ERROR_RATE", "0.5"))
+CIRCUIT_COOLDOWN = float(os.getenv("CIRCUIT_COOLDOWN", "30"))  # seconds
+PROVIDER_STATS_WINDOW = int(os.getenv("PROVIDER_STATS_WINDOW", "50"))  # requests
+
+
+class NoTranslationError(Exception):
+    """
+    Raised by a provider that answered normally but had no translation for the text
+    (e.g. it echoed the input back). Not counted against the provider's health.
+    """
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket rate limiter.
+    Tokens refill continuously at `rate` per second up to `capacity`;
+    each request consumes one token and blocks until one is available.
+    """
+
+    def __init__(self, rate: float, capacity: float = None):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        self._tokens = self.capacity
+        self._last_refill = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        # A non-positive rate disables limiting
+        if self.rate <= 0:
+            return
+
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._last_refill) * self.rate)
+                self._last_refill = now
+
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+
+                wait_time = (1 - self._tokens) / self.rate
+
+            time.sleep(wait_time)
+
+
+class ProviderHealth:
+    """
+    Rolling latency/error statistics and a circuit breaker for one provider.
+
+    States:
+        closed: requests flow normally
+        open: requests are refused until the cooldown has passed
+        half_open: a single trial request is allowed; success closes the circuit, failure reopens it
+    """
+
+    def __init__(self, name: str, window: int = 50, failure_threshold: int = 3, error_rate: float = 0.5,
+                 cooldown: float = 30):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.error_rate_threshold = error_rate
+        self.cooldown = cooldown
+
+        self._samples = deque(maxlen=window)  # (ok, latency_seconds, chars)
+        self._consecutive_failures = 0
+        self._state = "closed"
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    def allow_request(self) -> bool:
+        with self._lock:
+            if self._state == "closed":
+                return True
+            if self._state == "open" and time.monotonic() - self._opened_at >= self.cooldown:
+                self._state = "half_open"
+            if self._state == "half_open" and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            return False
+
+    def available(self) -> bool:
+        """
+        Whether a request would currently be allowed, without claiming a trial slot.
+        """
+        with self._lock:
+            if self._state == "closed":
+                return True
+            if self._state == "open":
+                return time.monotonic() - self._opened_at >= self.cooldown
+            return not self._trial_in_flight
+
+    def record_success(self, latency: float, chars: int):
+        with self._lock:
+            self._samples.append((True, latency, chars))
+            self._consecutive_failures = 0
+            self._trial_in_flight = False
+            self._state = "closed"
+
+    def record_failure(self, latency: float, chars: int):
+        with self._lock:
+            self._samples.append((False, latency, chars))
+            self._consecutive_failures += 1
+            self._trial_in_flight = False
+
+            failures = sum(1 for ok, _, _ in self._samples if not ok)
+            error_rate = failures / len(self._samples)
+            # Require a few samples before judging by error rate alone
+            rate_exceeded = len(self._samples) >= 2 * self.failure_threshold and error_rate > self.error_rate_threshold
+
+            if self._state == "half_open" or self._consecutive_failures >= self.failure_threshold or rate_exceeded:
+                if self._state != "open":
+                    print(f"{self.name} circuit opened after {self._consecutive_failures} consecutive failures "
+                          f"(error rate {error_rate:.0%})")
+                self._state = "open"
+                self._opened_at = time.monotonic()
+
+    def seconds_per_char(self) -> Optional[float]:
+        """
+        Mean latency per character of recent successful requests, or None without samples.
+        """
+        with self._lock:
+            latency = sum(latency for ok, latency, _ in self._samples if ok)
+            chars = sum(chars for ok, _, chars in self._samples if ok)
+        return latency / chars if chars else None
+
+    def stats(self) -> dict:
+        with self._lock:
+            successes = [latency for ok, latency, _ in self._samples if ok]
+            failures = len(self._samples) - len(successes)
+            return {
+                'state': self._state,
+                'requests': len(self._samples),
+                'error_rate': failures / len(self._samples) if self._samples else 0.0,
+                'avg_latency_ms': 1000 * sum(successes) / len(successes) if successes else None,
+                'consecutive_failures': self._consecutive_failures,
+            }
+
+
+class TranslationProvider:
+    """
+    Base class for translation backends.
+
+    Capabilities:
+        max_payload: Maximum characters per request
+        supports_batch: Whether several newline-separated segments may be sent in one request
+            and come back on separate lines
+        cacheable: Whether its output is a real translation that may be stored in the
+            translation memory
+        rate_limit: Requests per second (0 = unlimited)
+        concurrency: Maximum in-flight requests
+    """
+
+    name = None
+    max_payload = 450
+    supports_batch = True
+    cacheable = True
+
+    def __init__(self, rate_limit: float = 0, concurrency: int = 4):
+        self.rate_limit = rate_limit
+        self.concurrency = max(1, concurrency)
+        self._semaphore = threading.BoundedSemaphore(self.concurrency)
+        self._rate_limiter = TokenBucket(rate_limit, capacity=self.concurrency)
+        self.health = ProviderHealth(
+            self.name,
+            window=PROVIDER_STATS_WINDOW,
+            failure_threshold=CIRCUIT_FAILURE_THRESHOLD,
+            error_rate=CIRCUIT_ERROR_RATE,
+            cooldown=CIRCUIT_COOLDOWN
+        )
+
+    @contextmanager
+    def slot(self):
+        """
+        Hold one of the provider's concurrency slots and consume a rate limit token.
+        """
+        self._semaphore.acquire()
+        try:
+            self._rate_limiter.acquire()
+            yield
+        finally:
+            self._semaphore.release()
+
+    def request(self, text: str, source: str, target: str) -> str:
+        """
+        Translate one payload within the concurrency and rate limits, recording its outcome
+        for the circuit breaker and latency statistics.
+        """
+        if not self.health.allow_request():
+            raise Exception(f"{self.name} circuit is open")
+
+        with self.slot():
+            started = time.monotonic()
+            try:
+                result = self.translate(text, source, target)
+            except NoTranslationError:
+                # The provider is working, it just had nothing for this text
+                self.health.record_success(time.monotonic() - started, len(text))
+                raise
+            except Exception:
+                self.health.record_failure(time.monotonic() - started, len(text))
+                raise
+
+        self.health.record_success(time.monotonic() - started, len(text))
+        return result
+
+    def translate(self, text: str, source: str, target: str) -> str:
+        """
+        Translate one payload. Raises an exception when no translation is available.
+        """
+        raise NotImplementedError
+
+    def signature(self) -> str:
+        """
+        Identify the backend behind this provider, for cache keys of translated output.
+        """
+        return self.name
+
+
+class MyMemoryProvider(TranslationProvider):
+    """
+    MyMemory translation API (most accurate for Hindi-English, free).
+    """
+
+    name = 'mymemory'
+    max_payload = int(os.getenv("MYMEMORY_MAX_PAYLOAD", "450"))  # MyMemory rejects more than 500 chars
+
+    # Map language codes to MyMemory format
+    lang_map = {
+        'en': 'en-US',
+        'hi': 'hi-IN',
+    }
+
+    url = "https://api.mymemory.translated.net/get"
+
+    def translate(self, text: str, source: str, target: str) -> str:
+        response = get_session().get(
+            self.url,
+            params={
+                'q': text.strip(),
+                'langpair': f"{self.lang_map.get(source, source)}|{self.lang_map.get(target, target)}"
+            },
+            timeout=get_timeout()
+        )
+        if response.status_code == 429:
+            raise Exception("MyMemory rate limit exceeded")
+        response.raise_for_status()
+
+        data = response.json()
+        # Quota and validation errors come back with HTTP 200 and an error status in the body
+        if str(data.get('responseStatus')) != '200':
+            raise Exception(f"MyMemory error: {data.get('responseDetails')}")
+
+        result = (data.get('responseData') or {}).get('translatedText')
+        if not result:
+            matches = data.get('matches') or []
+            result = matches[0].get('translation') if matches else None
+
+        # MyMemory sometimes returns the original if no translation available
+        if not result or result == text.strip():
+            raise NoTranslationError("MyMemory returned no translation")
+        return result
+
+
+class GoogleProvider(TranslationProvider):
+    """
+    Google Translate web endpoint (reliable fallback).
+    """
+
+    name = 'google'
+    max_payload = int(os.getenv("GOOGLE_MAX_PAYLOAD", "4500"))  # Google Translate accepts up to 5000 chars
+
+    url = "https://translate.google.com/m"
+
+    def translate(self, text: str, source: str, target: str) -> str:
+        response = get_session().get(
+            self.url,
+            params={'sl': source, 'tl': target, 'q': text.strip()},
+            timeout=get_timeout()
+        )
+        if response.status_code == 429:
+            raise Exception("Google Translate rate limit exceeded")
+        response.raise_for_status()
+
+        soup = BeautifulSoup(response.text, "html.parser")
+        element = soup.find("div", {"class": "result-container"}) or soup.find("div", {"class": "t0"})
+        if not element:
+            raise Exception("Google Translate returned no translation")
+
+        # Keep line breaks so newline-separated segments can be split back apart
+        for br in element.find_all("br"):
+            br.replace_with("\n")
+        result = element.get_text().strip()
+        if not result:
+            raise Exception("Google Translate returned no translation")
+        return result
+
+
+class LocalProvider(TranslationProvider):
+    """
+    Offline provider for air-gapped deployments and reproducible load tests.
+
+    With LOCAL_TRANSLATOR_URL set, segments are sent to a LibreTranslate-compatible
+    server (POST {url} with q/source/target). Otherwise translation happens in-process:
+    whole segments and single words found in the LOCAL_TRANSLATOR_DICTIONARY JSON file
+    ({"en-hi": {"hello": "नमस्ते"}}) are replaced and everything else is echoed back.
+    Only translations from a server are stored in the translation memory.
+    """
+
+    name = 'local'
+    max_payload = int(os.getenv("LOCAL_MAX_PAYLOAD", "10000"))
+
+    def __init__(self, url: str = "", dictionary_path: str = "", delay_ms: float = 0, **kwargs):
+        super().__init__(**kwargs)
+        self.url = url
+        self.cacheable = bool(url)
+        self.delay = delay_ms / 1000
+        self.dictionary_path = dictionary_path
+        self.dictionary = {}
+        if dictionary_path:
+            with open(dictionary_path, encoding='utf-8') as f:
+                self.dictionary = json.load(f)
+
+    def translate(self, text: str, source: str, target: str) -> str:
+        if self.delay:
+            time.sleep(self.delay)
+
+        if self.url:
+            response = get_session().post(
+                self.url,
+                json={'q': text, 'source': source, 'target': target, 'format': 'text'},
+                timeout=get_timeout()
+            )
+            response.raise_for_status()
+            return response.json()['translatedText']
+
+        entries = self.dictionary.get(f"{source}-{target}", {})
+        lines = []
+        for line in text.split('\n'):
+            if line in entries:
+                lines.append(entries[line])
+            else:
+                lines.append(' '.join(entries.get(word, word) for word in line.split(' ')))
+        return '\n'.join(lines)
+
+    def signature(self) -> str:
+        return f"{self.name}({self.url or self.dictionary_path})"
+
+
+_providers = {}
+_providers_lock = threading.Lock()
+
+
+def register_provider(provider: TranslationProvider):
+    """
+    Register a provider instance under its name, replacing any existing one.
+    """
+    with _providers_lock:
+        _providers[provider.name] = provider
+
+
+def get_provider(name: str) -> Optional[TranslationProvider]:
+    with _providers_lock:
+        return _providers.get(name)
+
+
+def get_active_providers() -> list:
+    """
+    Return the registered providers listed in TRANSLATION_PROVIDERS, in priority order.
+    """
+    with _providers_lock:
+        providers = [_providers[name] for name in TRANSLATION_PROVIDERS if name in _providers]
+
+    if not providers:
+        raise Exception(f"No translation providers available (TRANSLATION_PROVIDERS={','.join(TRANSLATION_PROVIDERS)})")
+    return providers
+
+
+def get_provider_signature() -> str:
+    """
+    Identify the active provider set in priority order, so translated output produced by
+    other providers is not reused.
+    """
+    return ','.join(provider.signature() for provider in get_active_providers())
+
+
+def get_routed_providers() -> list:
+    """
+    Return the active providers whose circuits allow requests, in the order to try them.
+
+    With TRANSLATION_ROUTING=latency, providers are ordered by recent latency per character,
+    so batches go to whichever healthy provider is currently fastest. Providers without
+    samples yet keep their configured priority ahead of measured ones so they get tried.
+    """
+    providers = [provider for provider in get_active_providers() if provider.health.available()]
+
+    if TRANSLATION_ROUTING == "latency":
+        def routing_key(indexed_provider):
+            priority, provider = indexed_provider
+            seconds_per_char = provider.health.seconds_per_char()
+            return (seconds_per_char is not None, seconds_per_char or 0.0, priority)
+
+        providers = [provider for _, provider in sorted(enumerate(providers), key=routing_key)]
+
+    return providers
+
+
+def get_provider_stats() -> dict:
+    with _providers_lock:
+        providers = list(_providers.values())
+    return {provider.name: provider.health.stats() for provider in providers}
+
+
+register_provider(MyMemoryProvider(
+    rate_limit=float(os.getenv("MYMEMORY_RATE_LIMIT", "4")),
+    concurrency=int(os.getenv("MYMEMORY_CONCURRENCY", "4"))
+))
+register_provider(GoogleProvider(
+    rate_limit=float(os.getenv("GOOGLE_RATE_LIMIT", "4")),
+    concurrency=int(os.getenv("GOOGLE_CONCURRENCY", "4"))
+))
+register_provider(LocalProvider(
+    url=LOCAL_TRANSLATOR_URL,
+    dictionary_path=LOCAL_TRANSLATOR_DICTIONARY,
+    delay_ms=LOCAL_TRANSLATOR_DELAY_MS,
+    rate_limit=float(os.getenv("LOCAL_RATE_LIMIT", "0")),
+    concurrency=int(os.getenv("LOCAL_CONCURRENCY", "16"))
+))
@@ -0,0 +1,154 @@
+import hashlib
+import os
+import shutil
+import tempfile
+import threading
+from typing import Optional
+from lru_store import select_evictions
+
+# Whole-document result cache settings
+RESULT_CACHE_ENABLED = os.getenv("RESULT_CACHE_ENABLED", "true").lower() == "true"
+RESULT_CACHE_DIR = os.getenv("RESULT_CACHE_DIR", "cache/results")
+RESULT_CACHE_MAX_MB = float(os.getenv("RESULT_CACHE_MAX_MB", "1024"))  # on-disk size
+
+
+class ResultCache:
+    """
+    Content-addressed cache of translated PDFs on local disk.
+
+    Entries are keyed by the SHA-256 of the uploaded PDF, the language pair and a signature of
+    the renderer, extraction settings and translation providers, so a repeat upload of the same
+    document is answered without parsing it. Each entry is one file whose modification time
+    records its last use; least recently used files are evicted once the directory grows past
+    its size limit.
+    """
+
+    def __init__(self, cache_dir: str, max_disk_bytes: int = 1024 * 1024 * 1024):
+        self.cache_dir = cache_dir
+        self.max_disk_bytes = max_disk_bytes
+
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        os.makedirs(cache_dir, exist_ok=True)
+
+    @staticmethod
+    def make_key(document_sha256: str, source_lang: str, target_lang: str, result_signature: str) -> str:
+        raw = f"{document_sha256}\x1f{source_lang}\x1f{target_lang}\x1f{result_signature}"
+        return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        """
+        Look up a cached result and mark it as recently used.
+
+        Returns:
+            Path of the cached PDF, or None on a miss
+        """
+        path = self._entry_path(key)
+        with self._lock:
+            try:
+                os.utime(path)
+            except FileNotFoundError:
+                self.misses += 1
+                return None
+            self.hits += 1
+            return path
+
+    def put(self, key: str, pdf_path: str):
+        """
+        Store a translated PDF. The file is hard-linked into the cache when possible and copied
+        otherwise; either way the entry appears atomically.
+        """
+        fd, temp_path = tempfile.mkstemp(suffix=".tmp", dir=self.cache_dir)
+        os.close(fd)
+        try:
+            os.remove(temp_path)
+            try:
+                os.link(pdf_path, temp_path)
+            except OSError:
+                shutil.copyfile(pdf_path, temp_path)
+            os.utime(temp_path)
+
+            with self._lock:
+                os.replace(temp_path, self._entry_path(key))
+                self._evict_disk()
+        except Exception:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+
+    def stats(self) -> dict:
+        with self._lock:
+            entries = self._scan_entries()
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(entries),
+                'disk_bytes': sum(size for _, size, _ in entries),
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+            }
+
+    def clear(self):
+        with self._lock:
+            for path, _, _ in self._scan_entries():
+                os.remove(path)
+
+    def _entry_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.pdf")
+
+    def _scan_entries(self) -> list:
+        # (path, size, last_used) for every entry in the cache directory
+        entries = []
+        with os.scandir(self.cache_dir) as scan:
+            for entry in scan:
+                if entry.name.endswith(".pdf"):
+                    try:
+                        stat = entry.stat()
+                    except FileNotFoundError:
+                        continue
+                    entries.append((entry.path, stat.st_size, stat.st_mtime))
+        return entries
+
+    def _evict_disk(self):
+        # Caller must hold self._lock
+        entries = sorted(self._scan_entries(), key=lambda entry: entry[2])
+        total = sum(size for _, size, _ in entries)
+        stale_paths = select_evictions(((path, size) for path, size, _ in entries), total, self.max_disk_bytes)
+        if not stale_paths:
+            return
+
+        for path in stale_paths:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+        self.evictions += len(stale_paths)
+        print(f"Result cache evicted {len(stale_paths)} entries")
+
+
+_result_cache = None
+_result_cache_lock = threading.Lock()
+
+
+def get_result_cache() -> Optional[ResultCache]:
+    """
+    Return the process-wide result cache, or None when it is disabled or unavailable.
+    """
+    global _result_cache
+    if not RESULT_CACHE_ENABLED:
+        return None
+
+    with _result_cache_lock:
+        if _result_cache is None:
+            try:
+                _result_cache = ResultCache(RESULT_CACHE_DIR, max_disk_bytes=int(RESULT_CACHE_MAX_MB * 1024 * 1024))
+            except Exception as e:
+                print(f"Result cache unavailable: {e}")
+                return None
+        return _result_cache
@@ -0,0 +1,213 @@
+import hashlib
+import os
+import re
+import threading
+from collections import OrderedDict
+from typing import Optional
+from lru_store import SQLiteLRUStore
+
+# Translation memory settings
+TRANSLATION_MEMORY_ENABLED = os.getenv("TRANSLATION_MEMORY_ENABLED", "true").lower() == "true"
+TRANSLATION_MEMORY_PATH = os.getenv("TRANSLATION_MEMORY_PATH", "cache/translation_memory.db")
+TRANSLATION_MEMORY_SIZE = int(os.getenv("TRANSLATION_MEMORY_SIZE", "10000"))  # in-memory entries
+TRANSLATION_MEMORY_MAX_MB = float(os.getenv("TRANSLATION_MEMORY_MAX_MB", "256"))  # on-disk size
+TRANSLATION_MEMORY_WARM_ENTRIES = int(os.getenv("TRANSLATION_MEMORY_WARM_ENTRIES", "2000"))
+
+
+def normalize_segment(text: str) -> str:
+    """
+    Normalize a (placeholder-protected) text segment for use as a memory key.
+    Collapses runs of spaces and tabs and strips each line, keeping line breaks.
+    """
+    lines = [re.sub(r'[ \t]+', ' ', line).strip() for line in text.strip().split('\n')]
+    return '\n'.join(lines)
+
+
+class TranslationMemory:
+    """
+    Two-tier translation memory: an in-process LRU in front of an SQLite store.
+
+    Entries are keyed by (source_lang, target_lang, normalized segment). Segments are
+    expected to be placeholder-protected already, so text that differs only in numbers,
+    dates or URLs shares a single entry.
+    """
+
+    def __init__(self, db_path: str, memory_size: int = 10000, max_disk_bytes: int = 256 * 1024 * 1024):
+        self.db_path = db_path
+        self.memory_size = memory_size
+        self.max_disk_bytes = max_disk_bytes
+
+        self._memory = OrderedDict()
+
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+        self._store = SQLiteLRUStore(
+            db_path, "translations",
+            "source_lang TEXT NOT NULL, target_lang TEXT NOT NULL, "
+            "source_text TEXT NOT NULL, translated_text TEXT NOT NULL",
+            name="Translation memory", max_disk_bytes=max_disk_bytes, on_evict=self._forget
+        )
+        self._lock = self._store.lock
+
+    @staticmethod
+    def make_key(source_lang: str, target_lang: str, text: str) -> str:
+        raw = f"{source_lang}\x1f{target_lang}\x1f{normalize_segment(text)}"
+        return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+    @property
+    def evictions(self) -> int:
+        return self._store.evictions
+
+    def get(self, source_lang: str, target_lang: str, text: str) -> Optional[str]:
+        """
+        Look up a translation, checking the memory tier before the disk tier.
+
+        Returns:
+            The cached translation, or None on a miss
+        """
+        key = self.make_key(source_lang, target_lang, text)
+
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                self.memory_hits += 1
+                return self._memory[key]
+
+            translation = self._store.fetch(key, "translated_text")
+            if translation is None:
+                self.misses += 1
+                return None
+
+            self.disk_hits += 1
+            self._remember(key, translation)
+            return translation
+
+    def put(self, source_lang: str, target_lang: str, text: str, translation: str):
+        """
+        Store a translation in both tiers.
+        """
+        key = self.make_key(source_lang, target_lang, text)
+        normalized = normalize_segment(text)
+        size = len(normalized.encode('utf-8')) + len(translation.encode('utf-8'))
+
+        with self._lock:
+            self._remember(key, translation)
+            self._store.store(key, {
+                'source_lang': source_lang,
+                'target_lang': target_lang,
+                'source_text': normalized,
+                'translated_text': translation,
+            }, size)
+
+    def warm(self, limit: int = None):
+        """
+        Preload the most recently used disk entries into the memory tier.
+        """
+        limit = self.memory_size if limit is None else min(limit, self.memory_size)
+        if limit <= 0:
+            return 0
+
+        with self._lock:
+            rows = self._store.conn.execute(
+                "SELECT key, translated_text FROM translations ORDER BY last_used DESC LIMIT ?", (limit,)
+            ).fetchall()
+            # Insert oldest first so the most recent entries end up at the LRU head
+            for key, translation in reversed(rows):
+                self._remember(key, translation)
+
+        print(f"Translation memory warmed with {len(rows)} entries")
+        return len(rows)
+
+    def import_from(self, other_db_path: str) -> int:
+        """
+        Merge entries from another translation memory file (e.g. one written by an earlier job
+        or another instance). Existing entries are kept.
+
+        Returns:
+            Number of entries imported
+        """
+        if not os.path.exists(other_db_path):
+            raise Exception(f"Translation memory file not found: {other_db_path}")
+
+        with self._lock:
+            conn = self._store.conn
+            before = conn.total_changes
+            conn.execute("ATTACH DATABASE ? AS other", (other_db_path,))
+            try:
+                conn.execute(
+                    "INSERT OR IGNORE INTO translations "
+                    "SELECT key, source_lang, target_lang, source_text, translated_text, size, last_used "
+                    "FROM other.translations"
+                )
+                conn.commit()
+            finally:
+                conn.execute("DETACH DATABASE other")
+            imported = conn.total_changes - before
+            self._store.evict()
+
+        print(f"Imported {imported} translation memory entries from {other_db_path}")
+        return imported
+
+    def stats(self) -> dict:
+        with self._lock:
+            disk_entries, disk_bytes = self._store.disk_usage()
+            lookups = self.memory_hits + self.disk_hits + self.misses
+            return {
+                'memory_entries': len(self._memory),
+                'disk_entries': disk_entries,
+                'disk_bytes': disk_bytes,
+                'memory_hits': self.memory_hits,
+                'disk_hits': self.disk_hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': (self.memory_hits + self.disk_hits) / lookups if lookups else 0.0,
+            }
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+            self._store.clear()
+
+    def close(self):
+        self._store.close()
+
+    def _remember(self, key: str, translation: str):
+        # Caller must hold self._lock
+        self._memory[key] = translation
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_size:
+            self._memory.popitem(last=False)
+
+    def _forget(self, keys: list):
+        # Called by the store with the lock held, after it evicted these rows
+        for key in keys:
+            self._memory.pop(key, None)
+
+
+_translation_memory = None
+_translation_memory_lock = threading.Lock()
+
+
+def get_translation_memory() -> Optional[TranslationMemory]:
+    """
+    Return the process-wide translation memory, or None when it is disabled or unavailable.
+    """
+    global _translation_memory
+    if not TRANSLATION_MEMORY_ENABLED:
+        return None
+
+    with _translation_memory_lock:
+        if _translation_memory is None:
+            try:
+                _translation_memory = TranslationMemory(
+                    TRANSLATION_MEMORY_PATH,
+                    memory_size=TRANSLATION_MEMORY_SIZE,
+                    max_disk_bytes=int(TRANSLATION_MEMORY_MAX_MB * 1024 * 1024)
+                )
+                _translation_memory.warm(TRANSLATION_MEMORY_WARM_ENTRIES)
+            except Exception as e:
+                print(f"Translation memory unavailable: {e}")
+                return None
+        return _translation_memory
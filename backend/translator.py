@@ -1,8 +1,36 @@
-from deep_translator import GoogleTranslator, MyMemoryTranslator
-import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+import os
+import threading
 import re
+from translation_memory import get_translation_memory
+from providers import get_active_providers, get_routed_providers
 
-def translate_text(text: str, source_lang: str = "hi", target_lang: str = "en") -> str:
+# Number of batches translated at the same time
+TRANSLATION_WORKERS = int(os.getenv("TRANSLATION_WORKERS", "8"))
+
+# Segments are packed into one request per provider, separated by newlines
+SEGMENT_SEPARATOR = "\n"
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    """
+    Return the shared chunk translation pool, creating it on first use.
+    """
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=max(1, TRANSLATION_WORKERS),
+                thread_name_prefix="translate"
+            )
+        return _executor
+
+
+def translate_text(text: str, source_lang: str = "hi", target_lang: str = "en", progress_callback=None) -> str:
     """
     Translate text from source language to target language using high-quality translation services.
     Uses multiple translation services with fallback for better accuracy.
@@ -11,6 +39,7 @@ def translate_text(text: str, source_lang: str = "hi", target_lang: str = "en")
         text: Text to translate
         source_lang: Source language code ('en' or 'hi')
         target_lang: Target language code ('en' or 'hi')
+        progress_callback: Optional callable(segments_done, total_segments) called as segments finish
 
     Returns:
         Translated text
@@ -21,32 +50,19 @@ def translate_text(text: str, source_lang: str = "hi", target_lang: str = "en")
         source = source_lang
         target = target_lang
 
-        # Maximum chunk size - MyMemory has 500 char limit
-        max_chunk_size = 450  # Keep safely under MyMemory's 500 char limit
+        # Segment size - the smallest payload any active provider accepts (450 chars for
+        # MyMemory's 500 char limit). Segments are packed into larger requests where allowed.
+        max_chunk_size = min(provider.max_payload for provider in get_active_providers())
 
         if len(text) <= max_chunk_size:
             # Translate in one go
-            return _translate_with_fallback(text, source, target)
+            return _translate_segments([text], source, target, progress_callback)[0][0]
         else:
             # Split into chunks and translate
             chunks = _split_text_into_chunks(text, max_chunk_size)
 
-            # Translate each chunk
-            translated_chunks = []
-            for i, chunk in enumerate(chunks):
-                print(f"Translating chunk {i+1}/{len(chunks)}")
-                try:
-                    translated_chunk = _translate_with_fallback(chunk, source, target)
-                    translated_chunks.append(translated_chunk)
-
-                    # Add delay to avoid rate limiting
-                    if i < len(chunks) - 1:
-                        time.sleep(0.5)  # Increased delay for better reliability
-
-                except Exception as e:
-                    print(f"Error translating chunk {i+1}: {e}")
-                    # If translation fails for a chunk, keep original text
-                    translated_chunks.append(chunk)
+            # Translate chunks concurrently; results come back in chunk order
+            translated_chunks, _ = _translate_segments(chunks, source, target, progress_callback)
 
             # Join without double newlines to avoid breaking formatting
             return " ".join(translated_chunks)
@@ -55,164 +71,376 @@ def translate_text(text: str, source_lang: str = "hi", target_lang: str = "en")
         raise Exception(f"Translation error: {str(e)}")
 
 
-def _translate_with_fallback(text: str, source: str, target: str) -> str:
+def translate_segments(segments: list, source_lang: str = "hi", target_lang: str = "en", progress_callback=None) -> tuple:
+    """
+    Translate independent text segments (e.g. the lines of a page), returning exactly one
+    translation per input segment in the same order, and how many could not be translated.
+
+    Segments are batched into provider requests together, but each result maps back to
+    its own segment. Segments longer than the provider limit are split and rejoined.
+
+    Args:
+        segments: Texts to translate
+        source_lang: Source language code ('en' or 'hi')
+        target_lang: Target language code ('en' or 'hi')
+        progress_callback: Optional callable(pieces_done, total_pieces) called as pieces finish
+
+    Returns:
+        (translated segments aligned with the input, number of segments that kept their
+        original text because every provider failed on them)
+    """
+    try:
+        max_size = min(provider.max_payload for provider in get_active_providers())
+
+        pieces = []
+        owners = []
+        for i, segment in enumerate(segments):
+            if len(segment) <= max_size:
+                pieces.append(segment)
+                owners.append(i)
+            else:
+                for chunk in _split_text_into_chunks(segment, max_size):
+                    pieces.append(chunk)
+                    owners.append(i)
+
+        translated_pieces, failed_pieces = _translate_segments(pieces, source_lang, target_lang, progress_callback)
+
+        parts = [[] for _ in segments]
+        for owner, translated in zip(owners, translated_pieces):
+            parts[owner].append(translated)
+
+        translations = [" ".join(segment_parts) if segment_parts else segments[i] for i, segment_parts in enumerate(parts)]
+        return translations, len({owners[i] for i in failed_pieces})
+
+    except Exception as e:
+        raise Exception(f"Translation error: {str(e)}")
+
+
+def _translate_segments(segments: list, source: str, target: str, progress_callback=None) -> tuple:
+    """
+    Translate a list of text segments, returning translations in the same order and
+    the segments that could not be translated.
+
+    Each segment is placeholder-protected and looked up in the translation memory.
+    Remaining segments are deduplicated, packed into batches up to the payload of the
+    provider tried first and translated on the shared worker pool. Provider concurrency and request
+    rate are limited per request, so throughput follows the allowed request rate.
+    Segments that cannot be translated keep their original text.
+
+    Returns:
+        (translations, indexes of the segments that kept their original text)
+    """
+    results = [None] * len(segments)
+    failed = []
+    memory = get_translation_memory()
+    pending = []
+
+    for i, segment in enumerate(segments):
+        if not segment.strip():
+            results[i] = segment
+            continue
+
+        # Preserve numbers and special patterns
+        protected, placeholders = _preserve_numbers_and_patterns(segment)
+
+        # Nothing left to translate (table cells of numbers, dates, URLs...)
+        if not any(char.isalpha() for char in protected):
+            results[i] = segment
+            continue
+
+        # Check translation memory before calling any provider.
+        # Keys use the placeholder-protected text, so segments differing only in numbers share an entry.
+        cached = _memory_get(memory, source, target, protected) if memory else None
+        if cached is not None:
+            results[i] = _restore_numbers_and_patterns(cached, placeholders)
+        else:
+            pending.append((i, protected, placeholders))
+
+    total = len(segments)
+    completed = [total - len(pending)]
+    completed_lock = threading.Lock()
+
+    # Translate repeated segments (headers, footers, boilerplate) only once
+    pending_counts = Counter(protected for _, protected, _ in pending)
+    unique_texts = list(pending_counts)
+    # Pack batches to the payload of the provider tried first, so each batch is a single request to it
+    # and batches go out concurrently up to that provider's limits
+    primary = (get_routed_providers() or get_active_providers())[0]
+    batches = [[unique_texts[j] for j in indexes] for indexes in _pack_segments(unique_texts, primary.max_payload)]
+
+    def translate_batch(indexed_batch):
+        i, batch = indexed_batch
+        print(f"Translating batch {i+1}/{len(batches)} ({len(batch)} segments)")
+        try:
+            return _translate_batch_with_fallback(batch, source, target)
+        except Exception as e:
+            print(f"Error translating batch {i+1}: {e}")
+            return [None] * len(batch), [None] * len(batch)
+        finally:
+            if progress_callback:
+                with completed_lock:
+                    completed[0] += sum(pending_counts[protected] for protected in batch)
+                    done = completed[0]
+                progress_callback(done, total)
+
+    translations = {}
+    batch_results = _get_executor().map(translate_batch, enumerate(batches))
+    for batch, (translated_batch, batch_providers) in zip(batches, batch_results):
+        for protected, translated, provider in zip(batch, translated_batch, batch_providers):
+            translations[protected] = translated
+            # Stand-in output (e.g. the local echo backend) is not kept as a translation
+            if translated is not None and memory and provider.cacheable:
+                _memory_put(memory, source, target, protected, translated)
+
+    for i, protected, placeholders in pending:
+        translated = translations.get(protected)
+        if translated is None:
+            # If translation fails for a segment, keep original text
+            print("Warning: All translation services failed for a segment, returning original text")
+            results[i] = segments[i]
+            failed.append(i)
+        else:
+            # Restore numbers and patterns
+            results[i] = _restore_numbers_and_patterns(translated, placeholders)
+
+    if progress_callback and not pending:
+        progress_callback(total, total)
+
+    return results, failed
+
+
+def _memory_get(memory, source: str, target: str, text: str):
+    # The translation memory is best-effort: on a storage error the segment goes to the providers
+    try:
+        return memory.get(source, target, text)
+    except Exception as e:
+        print(f"Error reading translation memory: {e}")
+        return None
+
+
+def _memory_put(memory, source: str, target: str, text: str, translation: str):
+    try:
+        memory.put(source, target, text, translation)
+    except Exception as e:
+        print(f"Error writing translation memory: {e}")
+
+
+def _pack_segments(texts: list, max_size: int) -> list:
+    """
+    Greedily pack consecutive segments into payloads of at most max_size characters,
+    counting one separator between segments. Segments that contain the separator or are
+    longer than max_size are sent on their own.
+
+    Returns:
+        List of index lists, one per payload
+    """
+    payloads = []
+    current = []
+    current_size = 0
+
+    for i, text in enumerate(texts):
+        size = len(text)
+        if SEGMENT_SEPARATOR in text or size >= max_size:
+            if current:
+                payloads.append(current)
+                current, current_size = [], 0
+            payloads.append([i])
+            continue
+
+        added_size = size + (len(SEGMENT_SEPARATOR) if current else 0)
+        if current and current_size + added_size > max_size:
+            payloads.append(current)
+            current, current_size = [], 0
+            added_size = size
+
+        current.append(i)
+        current_size += added_size
+
+    if current:
+        payloads.append(current)
+
+    return payloads
+
+
+def _translate_batch_with_fallback(batch: list, source: str, target: str) -> tuple:
     """
-    Attempt translation with multiple services for best quality.
-    Preserves numbers, dates, and special characters.
+    Attempt translation of a batch of placeholder-protected segments with multiple services.
+    Each provider gets the segments the previous ones could not translate, packed up to
+    its own payload limit.
 
-    Priority:
+    Providers are tried in routing order (see providers.get_routed_providers), skipping
+    any whose circuit breaker is open. With priority routing the default order is:
     1. MyMemory (most accurate, free)
     2. Google Translate (reliable fallback)
+
+    Returns:
+        (translations aligned with the batch, the provider that translated each segment),
+        both None where every provider failed
     """
-    if not text.strip():
-        return text
+    results = [None] * len(batch)
+    used_providers = [None] * len(batch)
+
+    for provider in get_routed_providers():
+        remaining = [i for i, result in enumerate(results) if result is None]
+        if not remaining:
+            break
+
+        remaining_texts = [batch[i] for i in remaining]
+        if provider.supports_batch:
+            payloads = _pack_segments(remaining_texts, provider.max_payload)
+        else:
+            payloads = [[j] for j in range(len(remaining_texts))]
+
+        for indexes in payloads:
+            texts = [remaining_texts[j] for j in indexes]
+            for j, translated in zip(indexes, _translate_payload(provider, texts, source, target)):
+                results[remaining[j]] = translated
+                if translated is not None:
+                    used_providers[remaining[j]] = provider
+
+    return results, used_providers
+
+
+def _translate_payload(provider, texts: list, source: str, target: str) -> list:
+    """
+    Send several segments to a provider as one request, joined by SEGMENT_SEPARATOR,
+    and split the result back into segments. If the provider does not keep the
+    separators, the segments are retried one request each.
+
+    Returns:
+        Translations aligned with texts, None for segments that failed
+    """
+    payload = SEGMENT_SEPARATOR.join(texts)
+    result = _call_provider(provider, payload, source, target)
+    if result is None:
+        return [None] * len(texts)
 
-    # Preserve numbers and special patterns
-    text_to_translate, placeholders = _preserve_numbers_and_patterns(text)
+    if len(texts) == 1:
+        return [result]
 
-    # Map language codes to MyMemory format
-    mymemory_lang_map = {
-        'en': 'en-US',
-        'hi': 'hi-IN',
-    }
+    parts = result.split(SEGMENT_SEPARATOR)
+    if len(parts) == len(texts) and all(part.strip() for part in parts):
+        return [part.strip() for part in parts]
 
-    mymemory_source = mymemory_lang_map.get(source, source)
-    mymemory_target = mymemory_lang_map.get(target, target)
+    print(f"{provider.name} returned {len(parts)} segments for {len(texts)}, retrying individually")
+    return [_call_provider(provider, text, source, target) for text in texts]
 
-    # Try MyMemory first (better quality for Hindi-English)
-    translated_result = None
+
+def _call_provider(provider, text: str, source: str, target: str):
+    """
+    Translate one payload with a single provider, within its concurrency and rate limits
+    and subject to its circuit breaker.
+
+    Returns:
+        The translation, or None if the provider failed
+    """
     try:
-        translator = MyMemoryTranslator(source=mymemory_source, target=mymemory_target)
-        result = translator.translate(text_to_translate)
+        result = provider.request(text, source, target)
 
-        # MyMemory sometimes returns the original if no translation available
-        if result and result != text_to_translate:
-            print(f"Translated with MyMemory: {len(text)} -> {len(result)} chars")
-            translated_result = result
+        print(f"Translated with {provider.name}: {len(text)} -> {len(result)} chars")
+        return result
     except Exception as e:
-        print(f"MyMemory translation failed: {e}")
+        print(f"{provider.name} translation failed: {e}")
 
-    # Fallback to Google Translate
-    if not translated_result:
-        try:
-            translator = GoogleTranslator(source=source, target=target)
-            result = translator.translate(text_to_translate)
+    return None
 
-            if result:
-                print(f"Translated with Google: {len(text)} -> {len(result)} chars")
-                translated_result = result
-        except Exception as e:
-            print(f"Google translation failed: {e}")
 
-    # If all translation services fail, use original
-    if not translated_result:
-        print("Warning: All translation services failed, returning original text")
-        translated_result = text_to_translate
+# Patterns to preserve (ordered from most specific to least specific).
+# More specific patterns MUST come before generic ones: they are combined into a single
+# alternation, and at each position the first alternative that matches wins.
+_PRESERVE_PATTERNS = [
+    # URLs (very specific, must be first)
+    ('URL', r'https?://[^\s]+'),
+
+    # Email addresses (very specific)
+    ('EMAIL', r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b'),
+
+    # Phone numbers (specific pattern with separators)
+    ('PHONE', r'\b\d{3}[-.]?\d{3}[-.]?\d{4}\b'),
+
+    # Dates (various formats, contain multiple numbers)
+    ('DATE', r'\b\d{1,2}[-/]\d{1,2}[-/]\d{2,4}\b'),
+    ('DATE_ISO', r'\b\d{4}[-/]\d{1,2}[-/]\d{1,2}\b'),
+
+    # Times (specific pattern with colons)
+    ('TIME', r'\b\d{1,2}:\d{2}(?::\d{2})?\s*(?:AM|PM|am|pm)?\b'),
 
-    # Restore numbers and patterns
-    final_result = _restore_numbers_and_patterns(translated_result, placeholders)
-    return final_result
+    # Currency amounts (numbers with currency symbols)
+    ('CURRENCY', r'(?:Rs\.?\s*|₹\s*|USD\s*|\$\s*|€\s*|£\s*)\d+(?:,\d{3})*(?:\.\d{2})?'),
+
+    # Numbers with units
+    ('NUMUNIT', r'\b\d+(?:\.\d+)?\s*(?:%|kg|km|m|cm|mm|g|mg|ml|l|GB|MB|KB|Rs|₹|\$|€|£)\b'),
+
+    # Percentages
+    ('PERCENT', r'\b\d+(?:\.\d+)?%'),
+
+    # Large numbers with commas
+    ('BIGNUM', r'\b\d{1,3}(?:,\d{3})+(?:\.\d+)?\b'),
+
+    # Decimals and floats
+    ('DECIMAL', r'\b\d+\.\d+\b'),
+
+    # Regular integers (MUST be last as it's most generic)
+    ('NUM', r'\b\d+\b'),
+]
+
+_PRESERVE_RE = re.compile('|'.join(f'(?P<{name}>{pattern})' for name, pattern in _PRESERVE_PATTERNS))
+
+# Use large unique numbers as placeholders - translation APIs typically preserve numbers.
+# Start from 999999900 to avoid collision with real numbers
+_PLACEHOLDER_BASE = 999999900
+_PLACEHOLDER_RUN_RE = re.compile(r'\d{%d,}' % len(str(_PLACEHOLDER_BASE)))
 
 
 def _preserve_numbers_and_patterns(text: str) -> tuple:
     """
     Replace numbers, dates, and special patterns with translation-proof placeholders.
     Uses numeric placeholders that won't be translated by APIs.
+
+    All patterns are matched by one precompiled alternation in a single left-to-right
+    pass, so matches never overlap and the cost stays linear in the text length.
     """
     placeholders = {}
-    counter = 0
-
-    # Patterns to preserve (ordered from most specific to least specific)
-    # More specific patterns MUST come before generic ones
-    patterns = [
-        # URLs (very specific, must be first)
-        (r'https?://[^\s]+', 'URL'),
-
-        # Email addresses (very specific)
-        (r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b', 'EMAIL'),
-
-        # Phone numbers (specific pattern with separators)
-        (r'\b\d{3}[-.]?\d{3}[-.]?\d{4}\b', 'PHONE'),
-
-        # Dates (various formats, contain multiple numbers)
-        (r'\b\d{1,2}[-/]\d{1,2}[-/]\d{2,4}\b', 'DATE'),
-        (r'\b\d{4}[-/]\d{1,2}[-/]\d{1,2}\b', 'DATE'),
-
-        # Times (specific pattern with colons)
-        (r'\b\d{1,2}:\d{2}(?::\d{2})?\s*(?:AM|PM|am|pm)?\b', 'TIME'),
-
-        # Currency amounts (numbers with currency symbols)
-        (r'(?:Rs\.?\s*|₹\s*|USD\s*|\$\s*|€\s*|£\s*)\d+(?:,\d{3})*(?:\.\d{2})?', 'CURRENCY'),
-
-        # Numbers with units
-        (r'\b\d+(?:\.\d+)?\s*(?:%|kg|km|m|cm|mm|g|mg|ml|l|GB|MB|KB|Rs|₹|\$|€|£)\b', 'NUMUNIT'),
-
-        # Percentages
-        (r'\b\d+(?:\.\d+)?%', 'PERCENT'),
-
-        # Large numbers with commas
-        (r'\b\d{1,3}(?:,\d{3})+(?:\.\d+)?\b', 'BIGNUM'),
-
-        # Decimals and floats
-        (r'\b\d+\.\d+\b', 'DECIMAL'),
-
-        # Regular integers (MUST be last as it's most generic)
-        (r'\b\d+\b', 'NUM'),
-    ]
-
-    # Collect all matches with their positions and pattern info
-    all_matches = []
-    for pattern, pattern_type in patterns:
-        for match in re.finditer(pattern, text):
-            all_matches.append({
-                'start': match.start(),
-                'end': match.end(),
-                'text': match.group(),
-                'pattern_type': pattern_type
-            })
-
-    # Sort by start position (ascending) and by length (descending) to handle overlaps
-    # Prefer longer matches at the same position (more specific patterns)
-    all_matches.sort(key=lambda x: (x['start'], -(x['end'] - x['start'])))
-
-    # Track replaced ranges to avoid overlaps
-    replaced_ranges = []
-    matches_to_replace = []
-
-    for match in all_matches:
-        # Check if this match overlaps with any already replaced range
-        overlaps = False
-        for r_start, r_end in replaced_ranges:
-            if not (match['end'] <= r_start or match['start'] >= r_end):
-                overlaps = True
-                break
-
-        if not overlaps:
-            matches_to_replace.append(match)
-            replaced_ranges.append((match['start'], match['end']))
-
-    # Now replace in reverse order by position (right to left) to preserve positions
-    modified_text = text
-    for match in reversed(matches_to_replace):
-        original = match['text']
-        # Use large unique numbers as placeholders - translation APIs typically preserve numbers
-        # Start from 999999900 to avoid collision with real numbers
-        placeholder = str(999999900 + counter)
-        placeholders[placeholder] = original
-        modified_text = modified_text[:match['start']] + placeholder + modified_text[match['end']:]
-        counter += 1
 
+    def replace(match):
+        placeholder = str(_PLACEHOLDER_BASE + len(placeholders))
+        placeholders[placeholder] = match.group()
+        return placeholder
+
+    modified_text = _PRESERVE_RE.sub(replace, text)
     return modified_text, placeholders
 
 
 def _restore_numbers_and_patterns(text: str, placeholders: dict) -> str:
     """
-    Restore the original numbers and patterns from placeholders.
+    Restore the original numbers and patterns from placeholders in a single pass.
     """
-    result = text
-    for placeholder, original in placeholders.items():
-        result = result.replace(placeholder, original)
-    return result
+    if not placeholders:
+        return text
+
+    sizes = sorted({len(placeholder) for placeholder in placeholders}, reverse=True)
+
+    def restore(match):
+        run = match.group()
+        if run in placeholders:
+            return placeholders[run]
+
+        # The provider may have joined placeholders to each other or to other digits
+        parts = []
+        i = 0
+        while i < len(run):
+            for size in sizes:
+                piece = run[i:i + size]
+                if piece in placeholders:
+                    parts.append(placeholders[piece])
+                    i += size
+                    break
+            else:
+                parts.append(run[i])
+                i += 1
+        return ''.join(parts)
+
+    return _PLACEHOLDER_RUN_RE.sub(restore, text)
 
 
 def _split_text_into_chunks(text: str, max_size: int) -> list: